@@ -1,32 +1,140 @@
+from __future__ import annotations
+
+import atexit
+import importlib
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
 
-import stripe
 from flask import Flask, render_template, request
-from flask_caching import Cache
-from flask_htmx import HTMX
-from flask_migrate import Migrate
-from flask_moment import Moment
-from posthog import Posthog
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from app.extensions import db, mail
-from app.extensions.admin import init_admin
-from app.extensions.celery import init_celery
-from app.extensions.security import init_app as init_security
+
+if TYPE_CHECKING:
+    from flask_caching import Cache
+    from flask_htmx import HTMX
+    from flask_migrate import Migrate
+    from flask_moment import Moment
 
 # to set the app Settings in the docker compose
-migrate = Migrate()
-moment = Moment()
-htmx = HTMX()
-cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
 
-posthog = Posthog(os.getenv("POSTHOG_API_KEY", ""), host="https://eu.i.posthog.com")
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that only stats the file every N records.
+
+    The stock handler stats the log file on every emit to check for
+    rollover, which is wasted I/O with a small maxBytes budget.
+    """
+
+    check_interval = 64
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._records_since_check = 0
+
+    def shouldRollover(self, record):  # noqa: N802 (logging API)
+        self._records_since_check += 1
+        if self._records_since_check < self.check_interval:
+            return False
+        self._records_since_check = 0
+        return super().shouldRollover(record)
+
+
+def _make_migrate() -> Migrate:
+    from flask_migrate import Migrate
+
+    return Migrate()
+
+
+def _make_moment() -> Moment:
+    from flask_moment import Moment
+
+    return Moment()
+
+
+def _make_htmx() -> HTMX:
+    from flask_htmx import HTMX
+
+    return HTMX()
+
+
+def _make_cache() -> Cache:
+    from flask_caching import Cache
+
+    return Cache(config={"CACHE_TYPE": "SimpleCache"})
+
+
+def _posthog_stub() -> SimpleNamespace:
+    return SimpleNamespace(capture=lambda *args, **kwargs: None, disabled=True)
+
+
+def _make_posthog() -> SimpleNamespace:
+    # The real client (HTTP session + consumer thread) is only built in
+    # create_app once the debug/testing flags are known; accessing the
+    # attribute outside an app yields a no-op stub.
+    return _posthog_stub()
+
+
+# Heavy extensions are created on first attribute access (PEP 562) so that
+# `import app` stays cheap for CLI commands and processes that never serve
+# requests. `from app import cache` etc. keeps working unchanged.
+_lazy_extensions = {
+    "migrate": _make_migrate,
+    "moment": _make_moment,
+    "htmx": _make_htmx,
+    "cache": _make_cache,
+    "posthog": _make_posthog,
+}
+
+
+def __getattr__(name: str):
+    try:
+        factory = _lazy_extensions[name]
+    except KeyError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}"
+        ) from None
+    instance = factory()
+    globals()[name] = instance
+    return instance
+
+
+# Blueprints are imported on registration, so deployments that list a module
+# in DISABLED_BLUEPRINTS never pay its import cost.
+BLUEPRINTS = [
+    ("app.public", None),
+    ("app.main", "/app"),
+    ("app.api", "/api"),
+    ("app.main.second_page", "/second_page"),
+    ("app.main.first", "/files"),
+    ("app.main.users", "/users"),
+    ("app.errors", None),
+]
+
+
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    # no transaction is open at connect time, so the pragmas can be
+    # executed directly without the autocommit save/restore dance
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+    dbapi_connection.execute("PRAGMA synchronous=NORMAL")
 
 
 def create_app():
+    # Deferred imports: only pay for stripe, admin, celery and security when
+    # an app instance is actually built.
+    import stripe
+
+    from app import cache, htmx, migrate, moment
+    from app.extensions.admin import init_admin
+    from app.extensions.celery import init_celery
+    from app.extensions.security import init_app as init_security
+
     app = Flask(__name__)
 
     app.config["APP_NAME"] = os.getenv("APP_NAME")
@@ -55,72 +163,71 @@ def create_app():
     init_admin(app)
     db.init_app(app)
     htmx.init_app(app)
-    cache.init_app(app)
+    # Share the cache across gunicorn workers via the Redis instance that
+    # already backs Celery; tests keep the in-process SimpleCache.
+    if app.testing:
+        cache.init_app(app)
+    else:
+        cache.init_app(
+            app,
+            config={
+                "CACHE_TYPE": "RedisCache",
+                "CACHE_REDIS_URL": app.config["REDIS_URL"],
+            },
+        )
     mail.init_app(app)
     migrate.init_app(app, db)
     moment.init_app(app)
 
-    # Enable foreign key support for SQLite
+    # Enable foreign key support for SQLite. The listener goes on the global
+    # Engine class, so guard against stacking a duplicate listener every time
+    # create_app() runs (e.g. once per test).
     if "sqlite" in app.config.get("SQLALCHEMY_DATABASE_URI", ""):
         from sqlalchemy import event
         from sqlalchemy.engine import Engine
 
-        @event.listens_for(Engine, "connect")
-        def set_sqlite_pragma(dbapi_connection, connection_record):
-            # the sqlite3 driver will not set PRAGMA foreign_keys
-            # if autocommit=False; set to True temporarily
-            ac = dbapi_connection.autocommit
-            dbapi_connection.autocommit = True
-
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
-
-            # restore previous autocommit setting
-            dbapi_connection.autocommit = ac
-
-    from app.public import bp as public_bp
-
-    app.register_blueprint(public_bp)
-
-    from app.main import bp as main_bp
-
-    app.register_blueprint(main_bp, url_prefix="/app")
-
-    from app.api import bp as api_bp
-
-    app.register_blueprint(api_bp, url_prefix="/api")
-
-    from app.main.second_page import bp as second_page_bp
-
-    app.register_blueprint(second_page_bp, url_prefix="/second_page")
-
-    from app.main.first import bp as first_bp
-
-    app.register_blueprint(first_bp, url_prefix="/files")
-
-    from app.main.users import bp as users_bp
-
-    app.register_blueprint(users_bp, url_prefix="/users")
-
-    from app.errors import bp as errors_bp
-
-    app.register_blueprint(errors_bp)
-
-    @app.before_request
-    def check_for_maintenance():
-        if (
-            app.config["MAINTENANCE_MODE"]
-            and request.blueprint != "public_bp"
-            and not request.path.startswith("/static/")
-        ):
-            return (
-                render_template("errors/maintenance.html"),
-                503,
-            )  # HTTP 503 Service Unavailable
+        if not event.contains(Engine, "connect", _set_sqlite_pragma):
+            event.listen(Engine, "connect", _set_sqlite_pragma)
+
+    disabled_blueprints = set(app.config.get("DISABLED_BLUEPRINTS", ()))
+    for module_path, url_prefix in BLUEPRINTS:
+        if module_path in disabled_blueprints:
+            continue
+        bp = importlib.import_module(module_path).bp
+        app.register_blueprint(bp, url_prefix=url_prefix)
+
+    # Only pay for the maintenance check when maintenance mode is actually
+    # on; the hook is not registered at all in the common case. The 503 body
+    # is rendered once at startup instead of per request.
+    if app.config["MAINTENANCE_MODE"]:
+        maintenance_body: list[str] = []
+
+        @app.before_request
+        def check_for_maintenance():
+            # the endpoint string is already resolved by routing, so checking
+            # it avoids the blueprint lookup; this also fixes the old
+            # "public_bp" name mismatch so public pages stay reachable
+            ep = request.endpoint
+            if ep and ep != "static" and not ep.startswith("public."):
+                if not maintenance_body:
+                    maintenance_body.append(
+                        render_template("errors/maintenance.html")
+                    )
+                return maintenance_body[0], 503  # HTTP 503 Service Unavailable
+
+    # Only build the real PostHog client (background consumer thread and
+    # HTTP session) for a production app with a configured key; debug and
+    # test runs get a no-op stub.
+    if not app.debug and not app.testing and os.getenv("POSTHOG_API_KEY"):
+        from posthog import Posthog
+
+        globals()["posthog"] = Posthog(
+            os.getenv("POSTHOG_API_KEY", ""), host="https://eu.i.posthog.com"
+        )
+    else:
+        globals()["posthog"] = _posthog_stub()
 
     if app.debug:
-        posthog.disabled = True
         app.logger.setLevel(logging.DEBUG)
 
     if not app.debug and not app.testing:
@@ -131,10 +238,8 @@ def create_app():
             stream_handler.setLevel(logging.INFO)
             app.logger.addHandler(stream_handler)
         else:
-            logs_path = Path("logs")
-            if not logs_path.exists():
-                logs_path.mkdir()
-            file_handler = RotatingFileHandler(
+            Path("logs").mkdir(parents=True, exist_ok=True)
+            file_handler = BatchedRotatingFileHandler(
                 "logs/flask.log", maxBytes=10240, backupCount=10
             )
             file_handler.setFormatter(
@@ -144,10 +249,35 @@ def create_app():
                 )
             )
             file_handler.setLevel(logging.INFO)
-            root.addHandler(file_handler)
+
+            # Request threads only enqueue records; the listener thread owns
+            # the blocking file writes and rollover checks.
+            log_queue: queue.Queue = queue.Queue(-1)
+            root.addHandler(QueueHandler(log_queue))
+            log_listener = QueueListener(
+                log_queue, file_handler, respect_handler_level=True
+            )
+            log_listener.start()
+            atexit.register(log_listener.stop)
+            app.extensions["log_listener"] = log_listener
 
         app.logger.setLevel(logging.INFO)
 
+    # Immutable config snapshot for per-request readers: a C-level attribute
+    # load instead of a dict lookup on the config proxy.
+    app.extensions["cfg"] = SimpleNamespace(
+        maintenance=app.config["MAINTENANCE_MODE"],
+        app_name=app.config["APP_NAME"],
+        debug=app.debug,
+        preprocessed_data_dir=app.config.get("PREPROCESSED_DATA_DIR", "preprocessed"),
+        preprocessed_path=Path(app.static_folder)  # type: ignore
+        / app.config.get("PREPROCESSED_DATA_DIR", "preprocessed"),
+        upload_path=Path(app.root_path).parent / "uploads",
+    )
+
+    from app.api import ApiSessionAuthMiddleware
+
+    app.wsgi_app = ApiSessionAuthMiddleware(app, app.wsgi_app)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=2, x_proto=1, x_host=1, x_prefix=1)
     return app
 
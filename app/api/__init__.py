@@ -1,12 +1,78 @@
 from flask import Blueprint
-from flask_login import login_required
+from itsdangerous import BadSignature, SignatureExpired
+from werkzeug.http import parse_cookie
 
 bp = Blueprint("api", __name__)
 
-from app.api import api
+from app.api import api  # noqa: E402, F401
 
 
-@bp.before_request
-@login_required
-def before_request():
-    pass
+class ApiSessionAuthMiddleware:
+    """Reject unauthenticated /api requests before Flask dispatch.
+
+    Validates the session cookie signature at the WSGI level instead of
+    running a @login_required before_request hook, so unauthenticated
+    requests never reach routing and authenticated ones skip the
+    user-loader DB hit. Clients carrying only a remember-me cookie (no
+    live session) are accepted via flask-login's cookie scheme. The
+    resolved user id is exposed via request.environ["app.user_id"];
+    views that need the full ORM User should still use @login_required
+    individually.
+    """
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path == "/api" or path.startswith("/api/"):
+            user_id = self._authenticated_user_id(environ)
+            if user_id is None:
+                start_response(
+                    "401 UNAUTHORIZED", [("Content-Type", "application/json")]
+                )
+                return [b'{"error": "unauthorized"}']
+            environ["app.user_id"] = user_id
+        return self.wsgi_app(environ, start_response)
+
+    def _authenticated_user_id(self, environ):
+        cookie_header = environ.get("HTTP_COOKIE")
+        if not cookie_header:
+            return None
+        cookies = parse_cookie(cookie_header)
+
+        user_id = self._session_user_id(cookies)
+        if user_id is not None:
+            return user_id
+        return self._remembered_user_id(cookies)
+
+    def _session_user_id(self, cookies):
+        cookie_name = self.app.config.get("SESSION_COOKIE_NAME", "session")
+        session_cookie = cookies.get(cookie_name)
+        if not session_cookie:
+            return None
+        serializer = self.app.session_interface.get_signing_serializer(self.app)
+        if serializer is None:
+            return None
+        try:
+            # same expiry Flask itself applies when opening the session
+            session_data = serializer.loads(
+                session_cookie,
+                max_age=int(self.app.permanent_session_lifetime.total_seconds()),
+            )
+        except (SignatureExpired, BadSignature):
+            return None
+        return session_data.get("_user_id")
+
+    def _remembered_user_id(self, cookies):
+        from flask_login.utils import decode_cookie
+
+        remember_cookie = cookies.get(
+            self.app.config.get("REMEMBER_COOKIE_NAME", "remember_token")
+        )
+        if not remember_cookie:
+            return None
+        # decode_cookie resolves the signing secret through current_app
+        with self.app.app_context():
+            return decode_cookie(remember_cookie)
@@ -1,8 +1,10 @@
 from flask import jsonify
 
+from app import cache
 from app.api import bp
 
 
 @bp.route("/", methods=["GET"])
+@cache.cached(timeout=60)
 def index():
     return jsonify({"message": "success"})
@@ -1,4 +1,4 @@
-from flask import abort, redirect, request, url_for
+from flask import abort, g, redirect, request, url_for
 from flask_admin import Admin, AdminIndexView
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.theme import Bootstrap4Theme
@@ -12,11 +12,15 @@ class AdminAccessMixin:
     """Mixin to provide admin access control for Flask-Admin views."""
 
     def is_accessible(self):
-        return (
-            current_user.is_active
-            and current_user.is_authenticated
-            and current_user.has_role("admin")
-        )
+        # resolve the LocalProxy once instead of on every attribute access
+        user = current_user._get_current_object()
+        if user is None or not user.is_authenticated or not user.is_active:
+            return False
+        # has_role iterates the roles collection; admin pages call
+        # is_accessible once per rendered view/link, so cache per request
+        if "_is_admin" not in g:
+            g._is_admin = user.has_role("admin")
+        return g._is_admin
 
     def _handle_view(self, name, **kwargs):
         """
@@ -1,6 +1,6 @@
 from celery import Celery, shared_task
 from celery.contrib.abortable import AbortableTask  # type: ignore
-from flask import Flask
+from flask import Flask, g, has_app_context, has_request_context
 from flask_mailman import EmailMultiAlternatives
 from flask_security import MailUtil
 
@@ -8,9 +8,16 @@ from . import mail
 
 
 def init_celery(app: Flask) -> Celery:
+    app_context = app.app_context
+
     class FlaskTask(AbortableTask):
         def __call__(self, *args: object, **kwargs: object) -> object:
-            with app.app_context():
+            # skip the context push when one is already active, e.g. for
+            # tasks invoked synchronously from within a request or another
+            # task
+            if has_app_context():
+                return self.run(*args, **kwargs)
+            with app_context():
                 return self.run(*args, **kwargs)
 
     celery_app = Celery(app.name, task_cls=FlaskTask)
@@ -24,6 +31,7 @@ def init_celery(app: Flask) -> Celery:
         ]
     )
     app.extensions["celery"] = celery_app
+    app.teardown_request(_flush_mail_buffer)
     return celery_app
 
 
@@ -40,8 +48,39 @@ def send_flask_mail(**kwargs):
         msg.send()
 
 
+@shared_task
+def send_flask_mail_batch(messages: list[dict]):
+    # one SMTP connection (and TLS handshake) for the whole batch
+    with mail.get_connection() as connection:
+        for kwargs in messages:
+            html = kwargs.pop("html", None)
+            msg = EmailMultiAlternatives(
+                **kwargs,
+                connection=connection,
+            )
+            if html:
+                msg.attach_alternative(html, "text/html")
+            msg.send()
+
+
+def _flush_mail_buffer(exc=None):
+    messages = g.pop("_mail_buffer", None)
+    if messages:
+        send_flask_mail_batch.delay(messages)
+
+
 class CeleryMailUtil(MailUtil):
     def send_mail(self, template, subject, recipient, sender, body, html, **kwargs):
-        send_flask_mail.delay(
-            subject=subject, body=body, html=html, to=[recipient], from_email=sender
-        )
+        message = {
+            "subject": subject,
+            "body": body,
+            "html": html,
+            "to": [recipient],
+            "from_email": sender,
+        }
+        if has_request_context():
+            # buffer mails sent during a request and enqueue them as one
+            # batch task in teardown_request
+            g.setdefault("_mail_buffer", []).append(message)
+        else:
+            send_flask_mail.delay(**message)
@@ -1,6 +1,7 @@
 from functools import wraps
 
 from flask import abort, request
+from flask_login import current_user
 from loguru import logger
 
 from app import cache, htmx
@@ -20,11 +21,28 @@ def disable_route():
 def make_cache_key_with_htmx(*args, **kwargs):
     """Create cache key that includes HTMX boosted state and request path."""
     cache_key = request.path + ("_htmx" if htmx.boosted else "")
-    logger.debug(f"Cache key: {cache_key}")
+    # deferred formatting: loguru only renders the message when DEBUG is
+    # actually enabled, unlike an f-string which always allocates
+    logger.debug("Cache key: {}", cache_key)
 
     return cache_key
 
 
+def make_user_cache_key_with_htmx(*args, **kwargs):
+    """Like make_cache_key_with_htmx, but scoped to the logged-in user."""
+    cache_key = f"{request.path}:{current_user.id}" + ("_htmx" if htmx.boosted else "")
+    logger.debug("Cache key: {}", cache_key)
+
+    return cache_key
+
+
+def delete_user_htmx_cache(path: str):
+    """Delete the current user's cache entries for `path` (plain and boosted)."""
+    key = f"{path}:{current_user.id}"
+    cache.delete(key)
+    cache.delete(key + "_htmx")
+
+
 def delete_htmx_cache(path: str):
     """Delete the cache for the key `path` and `path_htmx`.
 
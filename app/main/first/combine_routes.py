@@ -1,16 +1,150 @@
 """Routes for combining preprocessed datasets."""
 
+import hashlib
 import uuid
+from datetime import UTC, datetime
 from pathlib import Path
 
-from flask import current_app, jsonify, render_template, request, send_from_directory
+from flask import (
+    current_app,
+    flash,
+    g,
+    has_request_context,
+    jsonify,
+    render_template,
+    request,
+    send_from_directory,
+)
 from flask_htmx import make_response
 from flask_login import current_user
-from sqlalchemy import select
+from sqlalchemy import event, func, lambda_stmt, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload, with_loader_criteria
+from werkzeug.http import http_date
 
-from app import db, htmx
+from app import cache, db, htmx
 from app.main.first import bp
 from app.models import CombinedPreprocessingJob, PreprocessingJob, UploadedFile
+from app.tasks.combine_datasets import combine_preprocessed_datasets
+
+
+def _scoped_user_id() -> int | None:
+    """Current user's id, resolved without re-entering the ORM hook.
+
+    Resolving the current_user proxy may invoke the login manager's
+    user loader, whose own SELECT re-enters the hook below before the
+    user is cached on g — unbounded recursion. The flag turns that
+    inner execution into a no-op (the loader only queries the user
+    table).
+    """
+    if g.get("_scoping_combined_jobs", False):
+        return None
+    g._scoping_combined_jobs = True
+    try:
+        if not current_user.is_authenticated:
+            return None
+        return current_user.id
+    finally:
+        g._scoping_combined_jobs = False
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_combined_jobs_to_user(execute_state):
+    """Apply the ``user_id == current_user.id`` predicate declaratively.
+
+    Every combined-job read in this blueprint is scoped to the current
+    user; with_loader_criteria states that once per statement instead of
+    re-typing the filter in each view. The criteria is the documented
+    lambda form: user_id is a tracked closure variable that the lambda
+    system extracts as a bound parameter on every execution, so the id
+    travels with each request rather than riding along in the cached
+    statement structure.
+    """
+    if not execute_state.is_select or execute_state.is_relationship_load:
+        return
+    if not has_request_context() or request.blueprint != "first":
+        return
+    user_id = _scoped_user_id()
+    if user_id is None:
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(
+            CombinedPreprocessingJob,
+            lambda cls: cls.user_id == user_id,
+            include_aliases=True,
+        )
+    )
+
+
+def _get_completed_combined_job(job_uuid: str) -> CombinedPreprocessingJob | None:
+    """Look up a completed combined job with a compilation-cached statement.
+
+    lambda_stmt memoizes the compiled SQL, so the repeated per-request
+    lookups skip Core statement building entirely.
+    """
+    stmt = lambda_stmt(
+        lambda: select(CombinedPreprocessingJob).where(
+            CombinedPreprocessingJob.uuid == job_uuid,
+            CombinedPreprocessingJob.status == "completed",
+        )
+    )
+    return db.session.scalar(stmt)
+
+
+def _get_combined_job_by_task_id(task_id: str) -> CombinedPreprocessingJob | None:
+    stmt = lambda_stmt(
+        lambda: select(CombinedPreprocessingJob).where(
+            CombinedPreprocessingJob.task_id == task_id
+        )
+    )
+    return db.session.scalar(stmt)
+
+
+def _send_immutable_graph_file(file_path: Path):
+    """Serve a completed-job output file with conditional-GET caching.
+
+    Outputs of a completed job never change, so clients can revalidate
+    with an ETag (304, no body) and cache the blob aggressively.
+
+    With X_ACCEL_REDIRECT_PREFIX configured, the transfer is delegated to
+    nginx so the worker is freed immediately instead of pushing the bytes
+    through Python.
+
+    When the combine task left a pre-compressed .gz sibling and the client
+    accepts gzip, that variant is served as-is with Content-Encoding set,
+    so no request ever pays compression CPU.
+    """
+    gz_path = file_path.with_suffix(file_path.suffix + ".gz")
+    use_gzip = "gzip" in request.accept_encodings and gz_path.exists()
+    serve_path = gz_path if use_gzip else file_path
+
+    file_stat = serve_path.stat()
+    etag = hashlib.md5(
+        f"{serve_path}:{file_stat.st_mtime_ns}:{file_stat.st_size}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+
+    if request.if_none_match.contains(etag):
+        return "", 304
+
+    accel_prefix = current_app.config.get("X_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        response = current_app.response_class("")
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix}/{serve_path.name}"
+        response.headers["Content-Type"] = "application/octet-stream"
+    else:
+        response = send_from_directory(
+            str(serve_path.parent), serve_path.name, as_attachment=False
+        )
+        if use_gzip:
+            # the payload is the compressed CSV, not a gzip download
+            response.headers["Content-Type"] = "text/csv"
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.set_etag(etag)
+    response.headers["Last-Modified"] = http_date(file_stat.st_mtime)
+    response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
 
 
 @bp.route("/combine", methods=["GET"])
@@ -20,8 +154,11 @@ def combine_files():
     stmt = (
         select(PreprocessingJob)
         .join(UploadedFile)
+        .options(joinedload(PreprocessingJob.uploaded_file))
         .where(
             PreprocessingJob.status == "completed",
+            # only the user's own jobs are valid picks in start_combine_files
+            UploadedFile.user_id == current_user.id,
         )
         .order_by(PreprocessingJob.completed_at.desc())
     )
@@ -54,28 +191,32 @@ def start_combine_files():
             422,
         )
 
-    # Verify both jobs exist
-    first_job_stmt = (
-        select(PreprocessingJob)
-        .join(UploadedFile)
-        .where(
-            PreprocessingJob.uuid == first_job_id,
-            PreprocessingJob.status == "completed",
+    # Form values are strings; the job key is a native UUID column
+    try:
+        first_job_uuid = uuid.UUID(first_job_id)
+        second_job_uuid = uuid.UUID(second_job_id)
+    except ValueError:
+        return (
+            render_template(
+                "./first/partials/_error.html", error="Invalid job selection"
+            ),
+            422,
         )
-    )
-    first_job = db.session.scalar(first_job_stmt)
 
-    second_job_stmt = (
-        select(PreprocessingJob)
+    # Verify both jobs exist and belong to the user with a single COUNT;
+    # only the permission check is needed, so no rows are hydrated
+    valid_jobs = db.session.scalar(
+        select(func.count())
+        .select_from(PreprocessingJob)
         .join(UploadedFile)
         .where(
-            PreprocessingJob.uuid == second_job_id,
+            PreprocessingJob.uuid.in_([first_job_uuid, second_job_uuid]),
+            UploadedFile.user_id == current_user.id,
             PreprocessingJob.status == "completed",
         )
     )
-    second_job = db.session.scalar(second_job_stmt)
 
-    if not first_job or not second_job:
+    if valid_jobs != 2:
         return (
             render_template(
                 "./first/partials/_error.html", error="Invalid job selection"
@@ -85,8 +226,8 @@ def start_combine_files():
 
     # Create the combined job record
     combined_job = CombinedPreprocessingJob(
-        first_job_id=first_job_id,
-        second_job_id=second_job_id,
+        first_job_id=first_job_uuid,
+        second_job_id=second_job_uuid,
         user_id=current_user.id,
         status="processing",
     )
@@ -94,14 +235,14 @@ def start_combine_files():
     db.session.commit()
 
     # Start the celery task
-    from app.tasks.combine_datasets import combine_preprocessed_datasets
-
     task = combine_preprocessed_datasets.delay(str(combined_job.uuid))
 
     # Update with task ID
     combined_job.task_id = task.id
     db.session.commit()
 
+    _invalidate_combined_history_cache()
+
     return render_template(
         "./first/partials/_combine_started.html",
         task_id=task.id,
@@ -109,65 +250,125 @@ def start_combine_files():
     )
 
 
+_COMBINE_STATE_MAP = {
+    "pending": "PENDING",
+    "processing": "PROGRESS",
+    "completed": "SUCCESS",
+    "failed": "FAILURE",
+    "cancelled": "CANCELLED",
+}
+
+
 @bp.route("/combine/status/<task_id>", methods=["GET"])
 def combine_status(task_id):
-    """Check the status of a combine task."""
-    from app.tasks.combine_datasets import combine_preprocessed_datasets
+    """Check the status of a combine task.
 
-    task = combine_preprocessed_datasets.AsyncResult(task_id)
+    Served from the job record the task keeps updated, so polling does
+    not hit the Celery result backend; an ETag lets clients skip the
+    body entirely when nothing changed.
+    """
+    job = _get_combined_job_by_task_id(task_id)
 
-    if task.state == "PENDING":
+    if job is None:
+        # task was enqueued but its id is not committed yet
         response = {
-            "state": task.state,
+            "state": "PENDING",
             "current": 0,
             "total": 100,
             "status": "Task pending...",
             "percent": 0,
         }
-    elif task.state == "PROGRESS":
-        response = {
-            "state": task.state,
-            "current": task.info.get("current", 0),
-            "total": task.info.get("total", 100),
-            "status": task.info.get("status", ""),
-            "percent": task.info.get("percent", 0),
-        }
-    elif task.state == "SUCCESS":
-        response = {
-            "state": task.state,
-            "current": 100,
-            "total": 100,
-            "status": "Complete!",
-            "percent": 100,
-            "result": task.info.get("result", task.result),
-        }
-    else:  # FAILURE
-        response = {
-            "state": task.state,
-            "current": 0,
-            "total": 100,
-            "status": str(task.info),
-            "percent": 0,
-        }
+    else:
+        state = _COMBINE_STATE_MAP.get(job.status, "PENDING")
+        percent = job.percent or 0
+        if state == "SUCCESS":
+            common_nodes = (job.total_nodes or 0) - (
+                (job.nodes_from_first or 0) + (job.nodes_from_second or 0)
+            )
+            response = {
+                "state": state,
+                "current": 100,
+                "total": 100,
+                "status": "Complete!",
+                "percent": 100,
+                "result": {
+                    "result": {
+                        "combined_job_id": job.uuid,
+                        "total_nodes": job.total_nodes,
+                        "total_edges": job.total_edges,
+                        "nodes_from_first": job.nodes_from_first,
+                        "nodes_from_second": job.nodes_from_second,
+                        "common_nodes": common_nodes,
+                    }
+                },
+            }
+        elif state == "FAILURE":
+            response = {
+                "state": state,
+                "current": percent,
+                "total": 100,
+                "status": job.error_message or "Task failed",
+                "percent": percent,
+            }
+        else:
+            response = {
+                "state": state,
+                "current": percent,
+                "total": 100,
+                "status": job.current_step or "Task pending...",
+                "percent": percent,
+            }
+
+    etag = hashlib.md5(
+        f"{response['state']}:{response['percent']}:{response['status']}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        return "", 304
 
     if htmx:
-        return render_template(
-            "./first/partials/_combine_progress.html",
-            task_id=task_id,
-            task_state=response["state"],
-            percent=response["percent"],
-            status=response["status"],
-            result=response.get("result"),
+        resp = make_response(
+            render_template(
+                "./first/partials/_combine_progress.html",
+                task_id=task_id,
+                task_state=response["state"],
+                percent=response["percent"],
+                status=response["status"],
+                result=response.get("result"),
+            )
         )
     else:
-        return jsonify(response)
+        resp = jsonify(response)
+    resp.set_etag(etag)
+    return resp
+
+
+def _combined_history_cache_key(*args, **kwargs):
+    return f"combined_history:{current_user.id}:{htmx.boosted}"
+
+
+def _invalidate_combined_history_cache():
+    cache.delete(f"combined_history:{current_user.id}:True")
+    cache.delete(f"combined_history:{current_user.id}:False")
 
 
 @bp.route("/combine/history", methods=["GET"])
+@cache.cached(timeout=15, make_cache_key=_combined_history_cache_key)
 def combined_history():
     """Display history of combined preprocessing jobs."""
-    stmt = select(CombinedPreprocessingJob).order_by(
-        CombinedPreprocessingJob.started_at.desc()
+    # the history template renders first_job/second_job and their uploaded
+    # files per row; eager-load them to avoid N+1 selects
+    stmt = (
+        select(CombinedPreprocessingJob)
+        .options(
+            selectinload(CombinedPreprocessingJob.first_job).joinedload(
+                PreprocessingJob.uploaded_file
+            ),
+            selectinload(CombinedPreprocessingJob.second_job).joinedload(
+                PreprocessingJob.uploaded_file
+            ),
+        )
+        .order_by(CombinedPreprocessingJob.started_at.desc())
     )
     combined_jobs = db.session.scalars(stmt).all()
 
@@ -179,11 +380,7 @@ def combined_history():
 @bp.route("/combine/view/<uuid:job_id>", methods=["GET"])
 def view_combined_graph(job_id: uuid.UUID):
     """View the combined graph visualization."""
-    stmt = select(CombinedPreprocessingJob).where(
-        CombinedPreprocessingJob.uuid == str(job_id),
-        CombinedPreprocessingJob.status == "completed",
-    )
-    combined_job = db.session.scalar(stmt)
+    combined_job = _get_completed_combined_job(str(job_id))
 
     if not combined_job:
         return (render_template("errors/404.html", error="Combined job not found"), 404)
@@ -194,11 +391,7 @@ def view_combined_graph(job_id: uuid.UUID):
 @bp.route("/combine/data/<uuid:job_id>/nodes", methods=["GET"])
 def combined_graph_nodes_data(job_id: uuid.UUID):
     """Serve nodes data for combined graph visualization."""
-    stmt = select(CombinedPreprocessingJob).where(
-        CombinedPreprocessingJob.uuid == str(job_id),
-        CombinedPreprocessingJob.status == "completed",
-    )
-    job = db.session.scalar(stmt)
+    job = _get_completed_combined_job(str(job_id))
 
     if not job:
         return jsonify({"error": "Combined job not found"}), 404
@@ -207,20 +400,13 @@ def combined_graph_nodes_data(job_id: uuid.UUID):
         if not job.nodes_file:
             return jsonify({"error": "No nodes file available"}), 404
 
-        # Get the nodes file path
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        nodes_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.nodes_file  # type: ignore
-        )
+        # Get the nodes file path (dir resolved once at app startup)
+        nodes_path = current_app.extensions["cfg"].preprocessed_path / job.nodes_file
 
         if not nodes_path.exists():
             return jsonify({"error": f"Nodes file not found at {nodes_path}"}), 404
 
-        return send_from_directory(
-            str(nodes_path.parent), nodes_path.name, as_attachment=False
-        )
+        return _send_immutable_graph_file(nodes_path)
 
     except Exception as e:
         return jsonify({"error": f"Error reading nodes data: {str(e)}"}), 500
@@ -229,11 +415,7 @@ def combined_graph_nodes_data(job_id: uuid.UUID):
 @bp.route("/combine/data/<uuid:job_id>/edges", methods=["GET"])
 def combined_graph_edges_data(job_id: uuid.UUID):
     """Serve edges data for combined graph visualization."""
-    stmt = select(CombinedPreprocessingJob).where(
-        CombinedPreprocessingJob.uuid == str(job_id),
-        CombinedPreprocessingJob.status == "completed",
-    )
-    job = db.session.scalar(stmt)
+    job = _get_completed_combined_job(str(job_id))
 
     if not job:
         return jsonify({"error": "Combined job not found"}), 404
@@ -242,18 +424,11 @@ def combined_graph_edges_data(job_id: uuid.UUID):
         if not job.edges_file:
             return jsonify({"error": "No edges file available"}), 404
 
-        # Get the edges file path
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        edges_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.edges_file  # type: ignore
-        )
+        # Get the edges file path (dir resolved once at app startup)
+        edges_path = current_app.extensions["cfg"].preprocessed_path / job.edges_file
         if not edges_path.exists():
             return jsonify({"error": f"Edges file not found at {edges_path}"}), 404
-        return send_from_directory(
-            str(edges_path.parent), edges_path.name, as_attachment=False
-        )
+        return _send_immutable_graph_file(edges_path)
     except Exception as e:
         return jsonify({"error": f"Error reading edges data: {str(e)}"}), 500
 
@@ -261,26 +436,20 @@ def combined_graph_edges_data(job_id: uuid.UUID):
 @bp.route("/combine/cancel/<task_id>", methods=["POST"])
 def cancel_combine_job(task_id):
     """Cancel a running combine task."""
-    from app.tasks.combine_datasets import combine_preprocessed_datasets
-
     task = combine_preprocessed_datasets.AsyncResult(task_id)
     # Check if task exists and is cancellable
     if task.state in ["PENDING", "PROGRESS"]:
         # Revoke the task
         task.revoke(terminate=True)
         # Update the database status
-        stmt = select(CombinedPreprocessingJob).where(
-            CombinedPreprocessingJob.task_id == task_id
-        )
-        job = db.session.scalar(stmt)
+        job = _get_combined_job_by_task_id(task_id)
         if job:
             job.status = "cancelled"
             job.completed_at = db.func.current_timestamp()
             job.error_message = "Task cancelled by user"
             db.session.commit()
+            _invalidate_combined_history_cache()
         # Return empty content to clear the progress display
-        from flask_htmx import make_response
-
         response = make_response(
             "",
             trigger="refresh",  # Trigger HTMX refresh
@@ -299,25 +468,32 @@ def cancel_combine_job(task_id):
 @bp.route("/combine/publish/<uuid:job_id>", methods=["POST"])
 def publish_combined_graph(job_id: uuid.UUID):
     """Publish a combined preprocessing job graph to the public gallery."""
-    from datetime import datetime
-
-    from flask import flash
-
-    job = db.session.get(CombinedPreprocessingJob, str(job_id))
+    # single UPDATE ... RETURNING instead of SELECT + mutate + flush
+    published_uuid = db.session.scalar(
+        update(CombinedPreprocessingJob)
+        .where(
+            CombinedPreprocessingJob.uuid == str(job_id),
+            CombinedPreprocessingJob.user_id == current_user.id,
+            CombinedPreprocessingJob.status == "completed",
+        )
+        .values(published=True, published_at=datetime.now(UTC))
+        .returning(CombinedPreprocessingJob.uuid)
+    )
 
-    if not job or job.status != "completed":
+    if published_uuid is None:
+        db.session.rollback()
         flash("Job not found or not completed", "error")
         return "", 404
-    job.published = True
-    job.published_at = datetime.now()
     db.session.commit()
 
+    _invalidate_combined_history_cache()
+
     flash("Combined graph published successfully!", "success")
     return make_response(
         render_template(
             "first/partials/_publish_button.html",
             published=True,
-            job_id=job.uuid,
+            job_id=published_uuid,
             is_combined=True,
         ),
         200,
@@ -328,24 +504,30 @@ def publish_combined_graph(job_id: uuid.UUID):
 @bp.route("/combine/unpublish/<uuid:job_id>", methods=["POST"])
 def unpublish_combined_graph(job_id: uuid.UUID):
     """Unpublish a combined preprocessing job graph from the public gallery."""
-    from flask import flash
-
-    job = db.session.get(CombinedPreprocessingJob, str(job_id))
+    unpublished_uuid = db.session.scalar(
+        update(CombinedPreprocessingJob)
+        .where(
+            CombinedPreprocessingJob.uuid == str(job_id),
+            CombinedPreprocessingJob.user_id == current_user.id,
+        )
+        .values(published=False, published_at=None)
+        .returning(CombinedPreprocessingJob.uuid)
+    )
 
-    if not job:
+    if unpublished_uuid is None:
+        db.session.rollback()
         flash("Job not found", "error")
         return "", 404
-
-    job.published = False
-    job.published_at = None
     db.session.commit()
 
+    _invalidate_combined_history_cache()
+
     flash("Combined graph unpublished successfully!", "success")
     return make_response(
         render_template(
             "first/partials/_publish_button.html",
             published=False,
-            job_id=job.uuid,
+            job_id=unpublished_uuid,
             is_combined=True,
         ),
         200,
@@ -1,9 +1,13 @@
+import hashlib
+import os
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
+from functools import lru_cache
 from pathlib import Path
 from uuid import uuid4
 
 import pandas as pd
+import pyarrow as pa
 import pyarrow.parquet as pq
 from celery import states
 from flask import (
@@ -12,17 +16,21 @@ from flask import (
     jsonify,
     render_template,
     request,
-    send_from_directory,
     url_for,
 )
 from flask_htmx import make_response
 from flask_login import current_user
 from loguru import logger
-from sqlalchemy import select
-from werkzeug.utils import secure_filename
+from pyarrow import csv as pacsv
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import selectinload
 
 from app import cache, db, htmx
-from app.helpers.app_helpers import make_cache_key_with_htmx
+from app.helpers.app_helpers import (
+    delete_user_htmx_cache,
+    make_cache_key_with_htmx,
+    make_user_cache_key_with_htmx,
+)
 from app.main.first import bp
 from app.models import (
     PlaylistEnrichmentJob,
@@ -34,20 +42,63 @@ from app.tasks.preprocessing import preprocess_spotify_data_original
 
 ALLOWED_EXTENSIONS = {"parquet"}
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+REQUIRED_COLUMNS = frozenset({"isrc", "playlist_id", "thu_date"})
+
+# Snapshot of app.debug, taken when the blueprint is registered, so the
+# per-request cache `unless` checks read a module global instead of
+# dereferencing the current_app proxy on every request
+_DEBUG = False
+
+
+@bp.record_once
+def _snapshot_debug(state):
+    global _DEBUG
+    _DEBUG = state.app.debug
+
+
+def allowed_file(filename: str) -> bool:
+    # rfind + slice instead of rsplit: no throwaway list, one scan
+    dot = filename.rfind(".")
+    return dot != -1 and filename[dot + 1 :].lower() in ALLOWED_EXTENSIONS
 
 
-def allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+@lru_cache(maxsize=256)
+def _parquet_column_names(path: str, mtime_ns: int, size: int) -> frozenset[str]:
+    """Parse the parquet footer once per (path, mtime, size) triple.
+
+    mtime/size key the cache so a replaced file re-parses while repeat
+    validations of the same upload skip the footer read. The memory map
+    lets Arrow read the footer in place instead of copying it onto the
+    Python heap, and the low-level parquet schema answers the names
+    without constructing an Arrow Schema.
+    """
+    with pa.memory_map(path, "r") as source:
+        return frozenset(pq.ParquetFile(source).schema.names)
 
 
 def validate_parquet_file(file_path):
     try:
-        parquet_file = pq.ParquetFile(file_path)
-        schema = parquet_file.schema_arrow
-        column_names = [field.name for field in schema]
+        file_stat = Path(file_path).stat()
+
+        # Check the PAR1 magic at both ends first: two tiny preads reject
+        # truncated or mislabelled uploads without paying for the thrift
+        # footer parse (a valid file is at least magic + footer length + magic)
+        if file_stat.st_size < 12:
+            return False, "Not a parquet file"
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            head = os.pread(fd, 4, 0)
+            tail = os.pread(fd, 4, file_stat.st_size - 4)
+        finally:
+            os.close(fd)
+        if head != b"PAR1" or tail != b"PAR1":
+            return False, "Not a parquet file"
+
+        column_names = _parquet_column_names(
+            str(file_path), file_stat.st_mtime_ns, file_stat.st_size
+        )
 
-        required_columns = {"isrc", "playlist_id", "thu_date"}
-        missing_columns = required_columns - set(column_names)
+        missing_columns = REQUIRED_COLUMNS - column_names
 
         if missing_columns:
             return (
@@ -60,15 +111,89 @@ def validate_parquet_file(file_path):
         return False, f"Invalid parquet file: {str(e)}"
 
 
-def add_cache_headers(response, max_age=300, private=True):
-    """Add client-side cache headers to response."""
+@lru_cache(maxsize=4)
+def _on_disk_uuids(folder: str, mtime_ns: int) -> frozenset[str]:
+    """Uuids of parquet files present in the upload folder.
+
+    Keyed by the folder's mtime, which changes whenever a file is added
+    or removed, so repeat listings skip the per-file stat pass and the
+    cache busts itself on any upload or delete.
+
+    os.scandir reads the names straight from the directory entries in a
+    single pass, without per-entry Path construction or fnmatch.
+    """
+    with os.scandir(folder) as entries:
+        return frozenset(
+            entry.name.removesuffix(".parquet")
+            for entry in entries
+            if entry.name.endswith(".parquet")
+        )
+
+
+def _read_csv_page(file_path: Path, offset: int, limit: int):
+    """Read one page of rows from a CSV without materializing the file.
+
+    Streams 1 MiB blocks through Arrow's CSV reader, skipping whole
+    batches until the offset is reached and stopping as soon as the page
+    is full, so bytes parsed scale with the page, not the file.
+    """
+    rows: list = []
+    remaining_skip = offset
+    with pacsv.open_csv(
+        str(file_path), read_options=pacsv.ReadOptions(block_size=1 << 20)
+    ) as reader:
+        columns = reader.schema.names
+        for batch in reader:
+            if remaining_skip >= batch.num_rows:
+                remaining_skip -= batch.num_rows
+                continue
+            sliced = batch.slice(remaining_skip, limit - len(rows))
+            remaining_skip = 0
+            rows.extend(
+                zip(*(column.to_pylist() for column in sliced.columns), strict=True)
+            )
+            if len(rows) >= limit:
+                break
+    return columns, rows
+
+
+def _count_csv_rows(file_path: Path) -> int:
+    """Count CSV data rows by streaming batches, without conversion."""
+    with pacsv.open_csv(
+        str(file_path), read_options=pacsv.ReadOptions(block_size=1 << 20)
+    ) as reader:
+        return sum(batch.num_rows for batch in reader)
+
+
+def add_cache_headers(response, max_age=300, private=True, file_stat=None):
+    """Add client-side cache headers to response.
+
+    When `file_stat` is given, also attach validators derived from it
+    (mtime_ns + size make a strong ETag: any rewrite changes at least
+    one of them), so clients can revalidate with a conditional GET once
+    max-age runs out instead of re-downloading the body.
+    """
     if private:
         response.headers["Cache-Control"] = f"private, max-age={max_age}"
     else:
         response.headers["Cache-Control"] = f"public, max-age={max_age}"
+    if file_stat is not None:
+        response.set_etag(f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}")
+        response.last_modified = datetime.fromtimestamp(file_stat.st_mtime, UTC)
     return response
 
 
+@bp.after_request
+def _honor_conditional_requests(response):
+    """Answer If-None-Match/If-Modified-Since with 304 where possible.
+
+    Runs outside the view cache, so cached entries keep their full 200
+    body while each client that already holds the bytes gets the empty
+    304. Responses without validators pass through untouched.
+    """
+    return response.make_conditional(request)
+
+
 @bp.route("/", methods=["GET"])
 @cache.cached(
     timeout=300,
@@ -85,68 +210,158 @@ def index():
 @bp.route("/<uuid:uuid>", methods=["GET"])
 def preview_file(uuid):
     """Show file preview page with metadata and data preview."""
-    upload_folder = Path(current_app.root_path).parent / "uploads"
+    upload_folder = current_app.extensions["cfg"].upload_path
     file_path = upload_folder / (str(uuid) + ".parquet")
 
-    if not file_path.exists() or file_path.suffix != ".parquet":
+    # one stat covers both the existence check and the size readout; the
+    # constructed name always carries the .parquet suffix
+    try:
+        file_stat = file_path.stat()
+    except OSError:
         return render_template("errors/404.html", error="File not found"), 404
 
-    file_stat = file_path.stat()
-
-    # Check for running preprocessing jobs for this file
-    uploaded_file = db.session.get(UploadedFile, str(uuid))
+    # One round trip: load the file with only the job rows the template
+    # needs (running/pending and completed, i.e. not cancelled/failed)
+    uploaded_file = db.session.scalar(
+        select(UploadedFile)
+        .where(UploadedFile.uuid == str(uuid))
+        .options(
+            selectinload(
+                UploadedFile.preprocessing_jobs.and_(
+                    PreprocessingJob.status.in_(
+                        ["pending", "processing", "completed"]
+                    )
+                )
+            )
+        )
+    )
 
     running_job = None
+    completed_job = None
+    has_jobs = False
     if uploaded_file:
-        # Look for any running or pending jobs for this file (exclude cancelled)
-        job_stmt = (
-            select(PreprocessingJob)
-            .where(PreprocessingJob.file_uuid == uploaded_file.uuid)
-            .where(PreprocessingJob.status.in_(["pending", "processing"]))
-            .order_by(PreprocessingJob.started_at.desc())
+        # single pass: newest running job, first completed job
+        for job in uploaded_file.preprocessing_jobs:
+            if job.status == "completed":
+                if completed_job is None:
+                    completed_job = job
+            elif running_job is None or job.started_at > running_job.started_at:
+                running_job = job
+
+        # The filtered collection hides cancelled/failed jobs, but the
+        # history link must show whenever any job ever ran, so probe the
+        # table unfiltered
+        has_jobs = bool(uploaded_file.preprocessing_jobs) or (
+            db.session.scalar(
+                select(PreprocessingJob.uuid)
+                .where(PreprocessingJob.file_uuid == str(uuid))
+                .limit(1)
+            )
+            is not None
+        )
+
+    # The page is a pure function of the file version and the job rows
+    # rendered into it, so fold both into the validator; a match skips
+    # the template render and the body transfer entirely
+    etag = f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}-{int(has_jobs)}"
+    if uploaded_file is not None:
+        # renames only touch the DB row (mtime and size are unchanged),
+        # so the record's update time must be part of the validator too
+        etag += f"-{int(uploaded_file.updated_at.timestamp()):x}"
+    for job in (running_job, completed_job):
+        if job is not None:
+            etag += f"-{job.uuid}:{job.status}"
+    if request.if_none_match.contains(etag):
+        return "", 304
+
+    response = make_response(
+        render_template(
+            "./first/file_preview.html",
+            file=uploaded_file,
+            title=uploaded_file.name,
+            file_size_mb=round(file_stat.st_size / (1024 * 1024), 2),
+            running_job=running_job,
+            completed_job=completed_job,
+            has_jobs=has_jobs,
         )
-        running_job = db.session.scalar(job_stmt)
-    completed_job = next(
-        (job for job in uploaded_file.preprocessing_jobs if job.status == "completed"),
-        None,
     )
+    response.set_etag(etag)
+    # no-cache (not no-store): clients may keep the body but must
+    # revalidate, so job-state changes show up on the next load
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
-    return render_template(
-        "./first/file_preview.html",
-        file=uploaded_file,
-        title=uploaded_file.name,
-        file_size_mb=round(file_stat.st_size / (1024 * 1024), 2),
-        running_job=running_job,
-        completed_job=completed_job,
+
+@lru_cache(maxsize=256)
+def _cached_preview(path: str, mtime_ns: int, size: int):
+    """First 10 rows and the footer row count, parsed once per file version.
+
+    Backs preview_data on the paths Flask-Caching does not cover (DEBUG
+    mode, evicted entries): repeat previews of an unchanged file skip
+    the footer parse and batch decode entirely.
+    """
+    with pa.memory_map(path, "r") as source:
+        parquet_file = pq.ParquetFile(source)
+        total_rows = parquet_file.metadata.num_rows
+        if total_rows == 0:
+            # nothing to decode (and iter_batches would yield no batch)
+            return 0, parquet_file.schema.names, ()
+        first_batch = next(parquet_file.iter_batches(batch_size=10))
+        columns = first_batch.schema.names
+        rows = tuple(
+            zip(*(column.to_pylist() for column in first_batch.columns), strict=True)
+        )
+    return total_rows, columns, rows
+
+
+def _preview_cache_key(*args, **kwargs):
+    """Key the preview cache on the file's content hash.
+
+    The hash is computed while the upload streams to disk, so this is a
+    single indexed column read. Identical bytes re-uploaded under a new
+    uuid hit the same cache entry, and the key stays valid across
+    renames. Rows predating the hash column fall back to the path+mtime
+    key, which still self-busts when the file is replaced.
+    """
+    content_hash = db.session.scalar(
+        select(UploadedFile.content_hash).where(
+            UploadedFile.uuid == str(request.view_args["uuid"])
+        )
+    )
+    if content_hash:
+        return f"preview:{content_hash}"
+    file_path = current_app.extensions["cfg"].upload_path / (
+        str(request.view_args["uuid"]) + ".parquet"
     )
+    try:
+        mtime_ns = file_path.stat().st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return f"{request.path}:{mtime_ns}"
 
 
 @bp.route("/<uuid:uuid>/preview", methods=["GET"])
 @cache.cached(
     timeout=300,
-    unless=lambda: current_app.config.get("DEBUG", False),
+    make_cache_key=_preview_cache_key,
+    unless=lambda: _DEBUG,
 )  # Cache for 5 minutes
 def preview_data(uuid):
     """Load and return the actual parquet file data preview."""
-    upload_folder = Path(current_app.root_path).parent / "uploads"
+    upload_folder = current_app.extensions["cfg"].upload_path
     file_path = upload_folder / (str(uuid) + ".parquet")
 
-    if not file_path.exists() or file_path.suffix != ".parquet":
+    try:
+        file_stat = file_path.stat()
+    except OSError:
         return render_template("errors/404.html", error="File not found"), 422
 
     try:
-        # Read only first 10 rows of the parquet file for preview
-        parquet_file = pq.ParquetFile(str(file_path))
-
-        total_rows = parquet_file.metadata.num_rows
-
-        # Read only first 10 rows
-        first_batch = next(parquet_file.iter_batches(batch_size=10))
-        preview_df = first_batch.to_pandas()
-
-        # Convert to dict for template
-        columns = preview_df.columns.tolist()
-        rows = preview_df.values.tolist()
+        # Memory-mapped, footer-only read of the first 10 rows, memoized
+        # per file version so only the first preview pays the parse
+        total_rows, columns, rows = _cached_preview(
+            str(file_path), file_stat.st_mtime_ns, file_stat.st_size
+        )
 
         response = make_response(
             render_template(
@@ -156,8 +371,10 @@ def preview_data(uuid):
                 total_rows=total_rows,
             )
         )
-        if not current_app.config.get("DEBUG", False):
-            return add_cache_headers(response, max_age=300)  # Cache for 5 minutes
+        if not _DEBUG:
+            # Cache for 5 minutes, then revalidate against the file's
+            # mtime/size instead of re-downloading the table
+            return add_cache_headers(response, max_age=300, file_stat=file_stat)
         else:
             return response
     except Exception as e:
@@ -208,13 +425,12 @@ def view_processed_file(file_uuid: uuid.UUID, file_type: str):
                 )
             file_name = job.nodes_file
 
-        # Resolve path relative to static directory
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        file_path = Path(current_app.static_folder) / preprocessed_data_dir / file_name  # type: ignore
+        # Resolved once at app init; see app.extensions["cfg"]
+        file_path = current_app.extensions["cfg"].preprocessed_path / file_name
 
-        if not file_path.exists():
+        try:
+            file_stat = file_path.stat()
+        except OSError:
             return (
                 render_template(
                     "errors/404.html", error=f"File not found: {file_name}"
@@ -227,48 +443,73 @@ def view_processed_file(file_uuid: uuid.UUID, file_type: str):
         per_page = request.args.get("per_page", 100, type=int)
         per_page = min(per_page, 1000)  # Cap at 1000 rows per page
 
-        # Read the CSV file
-        df = pd.read_csv(file_path)
-        total_rows = len(df)
-
-        # Calculate pagination
-        offset = (page - 1) * per_page
-        df_page = df.iloc[offset : offset + per_page]
-
-        # Convert to dict for template
-        columns = df_page.columns.tolist()
-        rows = df_page.values.tolist()
+        # Two indexed LIMIT 1 lookups instead of hydrating every
+        # historical enrichment attempt just to derive these
+        enriched = (
+            db.session.scalar(
+                select(PlaylistEnrichmentJob.uuid)
+                .where(
+                    PlaylistEnrichmentJob.preprocessing_job_id == job.uuid,
+                    PlaylistEnrichmentJob.status == "completed",
+                )
+                .limit(1)
+            )
+            is not None
+        )
 
-        # Calculate pagination info
-        total_pages = (total_rows + per_page - 1) // per_page
+        # might be a problem if there are multiple
+        job_in_progress = db.session.scalar(
+            select(PlaylistEnrichmentJob)
+            .where(
+                PlaylistEnrichmentJob.preprocessing_job_id == job.uuid,
+                PlaylistEnrichmentJob.status == "processing",
+            )
+            .limit(1)
+        )
 
-        enrichment_stmt = select(PlaylistEnrichmentJob).where(
-            PlaylistEnrichmentJob.preprocessing_job_id == str(job.uuid),
+        # Job output is immutable, so mtime+size identify the page body;
+        # the enrichment flags render into it too, hence the suffix. A
+        # match skips the CSV decode and template render entirely.
+        etag = (
+            f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}-"
+            f"{int(enriched)}{int(job_in_progress is not None)}"
         )
+        if request.if_none_match.contains(etag):
+            return "", 304
 
-        enrichment_jobs = db.session.scalars(enrichment_stmt).all()
-        enriched = any(job.status == "completed" for job in enrichment_jobs)
+        # Row counts are recorded on the job at preprocessing time; only
+        # older jobs without them need a counting pass
+        total_rows = job.final_edges if file_type == "edges" else job.final_nodes
+        if total_rows is None:
+            total_rows = _count_csv_rows(file_path)
 
-        # might be a problem if there are multiple
-        job_in_progress = next(
-            (job for job in enrichment_jobs if job.status == "processing"), None
-        )
+        # Stream just the requested page instead of loading the full file
+        offset = (page - 1) * per_page
+        columns, rows = _read_csv_page(file_path, offset, per_page)
 
-        return render_template(
-            "./first/processed_view.html",
-            job_id=job.uuid,
-            file_type=file_type,
-            file_name=file_name,
-            columns=columns,
-            rows=rows,
-            total_rows=total_rows,
-            page=page,
-            per_page=per_page,
-            total_pages=total_pages,
-            uploaded_file=job.uploaded_file,
-            enrichment_job=job_in_progress if job_in_progress else None,
-            enriched=enriched,
+        # Calculate pagination info
+        total_pages = (total_rows + per_page - 1) // per_page
+
+        response = make_response(
+            render_template(
+                "./first/processed_view.html",
+                job_id=job.uuid,
+                file_type=file_type,
+                file_name=file_name,
+                columns=columns,
+                rows=rows,
+                total_rows=total_rows,
+                page=page,
+                per_page=per_page,
+                total_pages=total_pages,
+                uploaded_file=job.uploaded_file,
+                enrichment_job=job_in_progress if job_in_progress else None,
+                enriched=enriched,
+            )
         )
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
     except Exception as e:
         logger.error(f"Error reading processed file: {e}")
         return (
@@ -278,16 +519,26 @@ def view_processed_file(file_uuid: uuid.UUID, file_type: str):
 
 
 @bp.route("/list", methods=["GET"])
+@cache.cached(timeout=15, make_cache_key=make_user_cache_key_with_htmx)
 def list_files():
-    """List all uploaded files that exist both on disk and in database."""
-    upload_folder = Path(current_app.root_path).parent / "uploads"
+    """List the user's uploaded files that exist both on disk and in database."""
+    upload_folder = current_app.extensions["cfg"].upload_path
+
+    try:
+        on_disk = _on_disk_uuids(
+            str(upload_folder), upload_folder.stat().st_mtime_ns
+        )
+    except FileNotFoundError:
+        on_disk = frozenset()
 
     files = [
         file
         for file in db.session.scalars(
-            select(UploadedFile).order_by(UploadedFile.created_at.desc())
-        ).all()
-        if (upload_folder / (file.uuid + ".parquet")).exists()
+            select(UploadedFile)
+            .where(UploadedFile.user_id == current_user.id)
+            .order_by(UploadedFile.created_at.desc())
+        )
+        if file.uuid in on_disk
     ]
 
     return render_template("./first/partials/_file_list.html", files=files)
@@ -332,6 +583,8 @@ def rename_file(uuid: uuid.UUID):
         file.name = new_name
         db.session.commit()
 
+        delete_user_htmx_cache(url_for("first.list_files"))
+
         flash("File renamed successfully", "success")
 
         response = make_response(
@@ -356,7 +609,7 @@ def rename_file(uuid: uuid.UUID):
 @bp.route("/<uuid:uuid>", methods=["DELETE"])
 def delete_file(uuid: uuid.UUID):
     """Delete an uploaded file and its database record."""
-    upload_folder = Path(current_app.root_path).parent / "uploads"
+    upload_folder = current_app.extensions["cfg"].upload_path
     file_path = upload_folder / (str(uuid) + ".parquet")
 
     # Get the uploaded file record from database
@@ -404,6 +657,8 @@ def delete_file(uuid: uuid.UUID):
         if file_path.exists():
             file_path.unlink()
 
+        delete_user_htmx_cache(url_for("first.list_files"))
+
         flash("File deleted successfully", "success")
 
         response = make_response(
@@ -428,6 +683,18 @@ def delete_file(uuid: uuid.UUID):
 
 @bp.route("/", methods=["POST"])
 def upload_file():
+    # Reject oversize uploads from the Content-Length header before the
+    # body is read at all; the streaming check below still catches bodies
+    # that lie about (or omit) their length.
+    if request.content_length and request.content_length > MAX_FILE_SIZE:
+        return (
+            render_template(
+                "./first/partials/_error.html",
+                error=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
+            ),
+            413,
+        )
+
     if "file" not in request.files:
         return (
             render_template("./first/partials/_error.html", error="No file part"),
@@ -451,37 +718,79 @@ def upload_file():
             422,
         )
 
-    # Check file size
-    file.seek(0, 2)  # Seek to end (SEEK_END = 2)
-    file_length = file.tell()
-    file.seek(0)
-
-    if file_length > MAX_FILE_SIZE:
-        return (
-            render_template(
-                "./first/partials/_error.html",
-                error=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
-            ),
-            422,
-        )
-
     # Create upload directory if it doesn't exist
-    upload_folder = Path(current_app.root_path).parent / "uploads"
+    upload_folder = current_app.extensions["cfg"].upload_path
     upload_folder.mkdir(exist_ok=True)
 
-    filename = secure_filename(file.filename)
-    # Add timestamp to avoid collisions
+    # The stored name is server-generated, so the client filename never
+    # touches the filesystem and needs no sanitizing
     file_uuid = str(uuid4())
     filename = file_uuid + ".parquet"
     file_path = upload_folder / filename
 
+    # Stage under .tmp and rename into place only after validation, so a
+    # crash mid-upload never leaves a partial file where listings look
+    tmp_folder = upload_folder / ".tmp"
+    tmp_folder.mkdir(exist_ok=True)
+    tmp_path = tmp_folder / filename
+
     try:
-        file.save(str(file_path))
+        # Stream to disk in fixed-size chunks instead of buffering the whole
+        # body to measure it; oversize uploads are rejected as soon as the
+        # running total crosses the limit. The content hash rides along on
+        # the same pass so duplicates cost no extra read.
+        file_length = 0
+        chunk_size = 1 << 20  # 1MB
+        too_large = False
+        hasher = hashlib.sha256()
+        with tmp_path.open("wb") as out:
+            while chunk := file.stream.read(chunk_size):
+                file_length += len(chunk)
+                if file_length > MAX_FILE_SIZE:
+                    too_large = True
+                    break
+                hasher.update(chunk)
+                out.write(chunk)
+            if not too_large and hasattr(os, "posix_fadvise"):
+                # hint the kernel that validation reads the file right
+                # away; not available outside Linux (macOS dev machines)
+                out.flush()
+                os.posix_fadvise(out.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+
+        if too_large:
+            tmp_path.unlink()
+            return (
+                render_template(
+                    "./first/partials/_error.html",
+                    error=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
+                ),
+                422,
+            )
+
+        # Skip identical re-uploads: same content hash for the same user
+        # means the bytes are already on disk and validated
+        content_hash = hasher.hexdigest()
+        uid = current_user.id
+        duplicate = db.session.scalar(
+            select(UploadedFile).where(
+                UploadedFile.user_id == uid,
+                UploadedFile.content_hash == content_hash,
+            )
+        )
+        if duplicate:
+            tmp_path.unlink()
+            return (
+                render_template(
+                    "./first/partials/_error.html",
+                    error=f'Identical file already uploaded as "{duplicate.name}"',
+                ),
+                422,
+            )
 
         # Validate that it's a valid parquet file
-        is_valid, error_message = validate_parquet_file(str(file_path))
+        is_valid, error_message = validate_parquet_file(str(tmp_path))
         if not is_valid:
-            file_path.unlink()
+            tmp_path.unlink()
             return (
                 render_template(
                     "./first/partials/_error.html",
@@ -490,6 +799,9 @@ def upload_file():
                 422,
             )
 
+        # Validation passed: move atomically into the upload folder
+        tmp_path.rename(file_path)
+
         # Extract date range from parquet file
         data_start_date = None
         data_end_date = None
@@ -514,13 +826,16 @@ def upload_file():
             uuid=file_uuid,
             name=file.filename.replace(".parquet", ""),
             file_size=file_length,
-            user_id=current_user.id,
+            content_hash=content_hash,
+            user_id=uid,
             data_start_date=data_start_date,
             data_end_date=data_end_date,
         )
         db.session.add(uploaded_file)
         db.session.commit()
 
+        delete_user_htmx_cache(url_for("first.list_files"))
+
         flash("File uploaded successfully", "success")
         return make_response(
             render_template(
@@ -530,8 +845,8 @@ def upload_file():
         )
 
     except Exception as e:
-        if file_path.exists():
-            file_path.unlink()
+        tmp_path.unlink(missing_ok=True)
+        file_path.unlink(missing_ok=True)
         flash("Failed to save file", "error")
         return make_response(
             render_template(
@@ -546,17 +861,27 @@ def upload_file():
 @bp.route("/<uuid:uuid>/preprocess", methods=["POST"])
 def start_preprocessing(uuid: uuid.UUID):
     """Start preprocessing task for uploaded parquet file."""
-    upload_folder = Path(current_app.root_path).parent / "uploads"
+    upload_folder = current_app.extensions["cfg"].upload_path
     file_path = upload_folder / (str(uuid) + ".parquet")
 
-    if not file_path.exists() or file_path.suffix != ".parquet":
+    if not file_path.is_file():
         return (
             render_template("./first/partials/_error.html", error="File not found"),
             422,
         )
 
-    # Get the uploaded file record using SQLAlchemy 2.0 style
-    uploaded_file = db.session.get(UploadedFile, str(uuid))
+    # Load the file and any running/pending jobs in one round trip
+    uploaded_file = db.session.scalar(
+        select(UploadedFile)
+        .where(UploadedFile.uuid == str(uuid))
+        .options(
+            selectinload(
+                UploadedFile.preprocessing_jobs.and_(
+                    PreprocessingJob.status.in_(["pending", "processing"])
+                )
+            )
+        )
+    )
 
     if not uploaded_file:
         return (
@@ -567,16 +892,7 @@ def start_preprocessing(uuid: uuid.UUID):
             422,
         )
 
-    # Check if there's already a running job for this file (exclude cancelled)
-    job_stmt = (
-        select(PreprocessingJob)
-        .where(PreprocessingJob.file_uuid == uploaded_file.uuid)
-        .where(PreprocessingJob.status.in_(["pending", "processing"]))
-        .order_by(PreprocessingJob.started_at.desc())
-    )
-    existing_job = db.session.scalar(job_stmt)
-
-    if existing_job:
+    if uploaded_file.preprocessing_jobs:
         return (
             render_template(
                 "./first/partials/_error.html",
@@ -609,33 +925,73 @@ def task_status(task_id):
     """Check the status of a preprocessing task."""
     task = preprocess_spotify_data_original.AsyncResult(task_id)
 
-    if task.state == "PENDING":
+    # One result-backend round trip per poll: state and payload live in
+    # the same task-meta document, while .state followed by .info would
+    # fetch and deserialize it twice
+    meta = task.backend.get_task_meta(task_id)
+    state = meta["status"]
+    info = meta["result"] if state != "PENDING" else {}
+    if info is None:
+        info = {}
+
+    if htmx:
+        # The partial only renders state/percent/status/result, so the
+        # per-second polling path skips the full response dict
+        result = None
+        if state == "PENDING":
+            percent, status = 0, "Task pending..."
+        elif state == "PROGRESS":
+            percent = info.get("percent", 0)
+            status = info.get("status", "")
+        elif state == "SUCCESS":
+            percent, status = 100, "Complete!"
+            result = info.get("result", info)
+            flash("Preprocessing completed successfully", "success")
+        elif state == "ABORTED":
+            state = "CANCELLED"
+            percent, status = 0, "Task cancelled"
+        else:  # FAILURE
+            percent, status = 0, str(info)
+
+        template = render_template(
+            "./first/partials/_task_progress.html",
+            task_id=task_id,
+            task_state=state,
+            percent=percent,
+            status=status,
+            result=result,
+        )
+        return make_response(
+            template, refresh=state == "SUCCESS"
+        )  # Trigger HTMX refresh only on success
+
+    if state == "PENDING":
         response = {
-            "state": task.state,
+            "state": state,
             "current": 0,
             "total": 100,
             "status": "Task pending...",
             "percent": 0,
         }
-    elif task.state == "PROGRESS":
+    elif state == "PROGRESS":
         response = {
-            "state": task.state,
-            "current": task.info.get("current", 0),
-            "total": task.info.get("total", 100),
-            "status": task.info.get("status", ""),
-            "percent": task.info.get("percent", 0),
+            "state": state,
+            "current": info.get("current", 0),
+            "total": info.get("total", 100),
+            "status": info.get("status", ""),
+            "percent": info.get("percent", 0),
         }
-    elif task.successful():
+    elif state == "SUCCESS":
         response = {
-            "state": task.state,
+            "state": state,
             "current": 100,
             "total": 100,
             "status": "Complete!",
             "percent": 100,
-            "result": task.info.get("result", task.result),
+            "result": info.get("result", info),
         }
         flash("Preprocessing completed successfully", "success")
-    elif task.state == "ABORTED":
+    elif state == "ABORTED":
         response = {
             "state": "CANCELLED",
             "current": 0,
@@ -645,30 +1001,15 @@ def task_status(task_id):
         }
     else:  # FAILURE
         response = {
-            "state": task.state,
+            "state": state,
             "current": 0,
             "total": 100,
-            "status": str(task.info),
+            "status": str(info),
             "percent": 0,
         }
 
-    if htmx:
-        # Return HTML partial for HTMX
-        template = render_template(
-            "./first/partials/_task_progress.html",
-            task_id=task_id,
-            task_state=response["state"],
-            percent=response["percent"],
-            status=response["status"],
-            result=response.get("result"),
-        )
-
-        return make_response(
-            template, refresh=response["state"] == "SUCCESS"
-        )  # Trigger HTMX refresh only on success
-    else:
-        # Return JSON for other requests
-        return jsonify(response)
+    # Return JSON for other requests
+    return jsonify(response)
 
 
 @bp.route("/cancel-job/<task_id>", methods=["POST"])
@@ -732,7 +1073,7 @@ def graph_nodes_data(job_id: uuid.UUID):
         select(PreprocessingJob)
         .join(UploadedFile)
         .where(
-            PreprocessingJob.uuid == str(job_id),
+            PreprocessingJob.uuid == job_id,
         )
     )
     job = db.session.scalar(stmt)
@@ -744,21 +1085,16 @@ def graph_nodes_data(job_id: uuid.UUID):
         if not job.nodes_file:
             return jsonify({"error": "No nodes file path set"}), 404
 
-        # Resolve path relative to static directory
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        nodes_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.nodes_file  # type: ignore
-        )
+        # Resolved once at app init; see app.extensions["cfg"]. No
+        # exists() precheck: the sender stats the file anyway, so a
+        # missing file surfaces as FileNotFoundError without the extra
+        # syscall (and without the check-then-open race)
+        nodes_path = current_app.extensions["cfg"].preprocessed_path / job.nodes_file
 
-        if not nodes_path.exists():
-            return jsonify({"error": f"Nodes file not found at {nodes_path}"}), 404
-
-        return send_from_directory(
-            str(nodes_path.parent), nodes_path.name, as_attachment=False
-        )
+        return _send_immutable_graph_file(nodes_path)
 
+    except FileNotFoundError:
+        return jsonify({"error": "Nodes file not found"}), 404
     except Exception as e:
         logger.error(f"Error reading nodes file: {e}")
         return jsonify({"error": "Error reading nodes data"}), 500
@@ -771,7 +1107,7 @@ def graph_edges_data(job_id: uuid.UUID):
         select(PreprocessingJob)
         .join(UploadedFile)
         .where(
-            PreprocessingJob.uuid == str(job_id),
+            PreprocessingJob.uuid == job_id,
         )
     )
     job = db.session.scalar(stmt)
@@ -783,22 +1119,13 @@ def graph_edges_data(job_id: uuid.UUID):
         if not job.edges_file:
             return jsonify({"error": "No edges file path set"}), 404
 
-        # Resolve path relative to static directory
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        edges_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.edges_file  # type: ignore
-        )
-
-        if not edges_path.exists():
-            return jsonify({"error": f"Edges file not found at {edges_path}"}), 404
+        # Resolved once at app init; see app.extensions["cfg"]. Missing
+        # files surface from the sender's stat, as in graph_nodes_data
+        edges_path = current_app.extensions["cfg"].preprocessed_path / job.edges_file
 
-        return send_from_directory(
-            str(edges_path.parent),
-            edges_path.name,
-            as_attachment=False,
-        )
+        return _send_immutable_graph_file(edges_path)
+    except FileNotFoundError:
+        return jsonify({"error": "Edges file not found"}), 404
     except Exception as e:
         logger.error(f"Error reading edges file: {e}")
         return jsonify({"error": "Error reading edges data"}), 500
@@ -811,7 +1138,7 @@ def start_playlist_enrichment(job_id: uuid.UUID):
         select(PreprocessingJob)
         .join(UploadedFile)
         .where(
-            PreprocessingJob.uuid == str(job_id),
+            PreprocessingJob.uuid == job_id,
         )
     )
     preprocessing_job = db.session.scalar(stmt)
@@ -837,8 +1164,9 @@ def start_playlist_enrichment(job_id: uuid.UUID):
     # Check if there's already a running enrichment job for this preprocessing job
     job_stmt = (
         select(PlaylistEnrichmentJob)
-        .where(PlaylistEnrichmentJob.preprocessing_job_id == str(job_id))
+        .where(PlaylistEnrichmentJob.preprocessing_job_id == job_id)
         .where(PlaylistEnrichmentJob.status.in_(["pending", "processing"]))
+        .limit(1)
     )
     existing_job = db.session.scalar(job_stmt)
 
@@ -866,9 +1194,16 @@ def enrichment_status(task_id):
     """Check the status of an enrichment task."""
     task = enrich_playlist_nodes.AsyncResult(task_id)
 
-    if task.state == "PENDING":
+    # Single task-meta fetch per poll, as in task_status
+    meta = task.backend.get_task_meta(task_id)
+    state = meta["status"]
+    info = meta["result"] if state != "PENDING" else {}
+    if info is None:
+        info = {}
+
+    if state == "PENDING":
         response = {
-            "state": task.state,
+            "state": state,
             "current": 0,
             "total": 100,
             "status": "Task pending...",
@@ -876,28 +1211,28 @@ def enrichment_status(task_id):
             "found": 0,
             "not_found": 0,
         }
-    elif task.state == "PROGRESS":
+    elif state == "PROGRESS":
         response = {
-            "state": task.state,
-            "current": task.info.get("current", 0),
-            "total": task.info.get("total", 100),
-            "status": task.info.get("status", ""),
-            "percent": task.info.get("percent", 0),
-            "found": task.info.get("found", 0),
-            "not_found": task.info.get("not_found", 0),
+            "state": state,
+            "current": info.get("current", 0),
+            "total": info.get("total", 100),
+            "status": info.get("status", ""),
+            "percent": info.get("percent", 0),
+            "found": info.get("found", 0),
+            "not_found": info.get("not_found", 0),
         }
-    elif task.state == "SUCCESS":
+    elif state == "SUCCESS":
         response = {
-            "state": task.state,
+            "state": state,
             "current": 100,
             "total": 100,
             "status": "Complete!",
             "percent": 100,
-            "found": task.info.get("found", 0),
-            "not_found": task.info.get("not_found", 0),
-            "result": task.info.get("result", task.result),
+            "found": info.get("found", 0),
+            "not_found": info.get("not_found", 0),
+            "result": info.get("result", info),
         }
-    elif task.state == "REVOKED":
+    elif state == "REVOKED":
         response = {
             "state": "CANCELLED",
             "current": 0,
@@ -909,10 +1244,10 @@ def enrichment_status(task_id):
         }
     else:  # FAILURE
         response = {
-            "state": task.state,
+            "state": state,
             "current": 0,
             "total": 100,
-            "status": str(task.info),
+            "status": str(info),
             "percent": 0,
             "found": 0,
             "not_found": 0,
@@ -945,17 +1280,22 @@ def cancel_enrichment_job(task_id):
         # Revoke the task
         task.revoke(terminate=True)
 
-        # Update the database status
-        stmt = select(PlaylistEnrichmentJob).where(
-            PlaylistEnrichmentJob.task_id == task_id
+        # One UPDATE instead of SELECT + flushed UPDATE: no row is
+        # hydrated, and the status guard makes the cancel idempotent
+        # under racing requests
+        db.session.execute(
+            update(PlaylistEnrichmentJob)
+            .where(
+                PlaylistEnrichmentJob.task_id == task_id,
+                PlaylistEnrichmentJob.status.in_(["pending", "processing"]),
+            )
+            .values(
+                status="cancelled",
+                completed_at=func.current_timestamp(),
+                error_message="Task cancelled by user",
+            )
         )
-        job = db.session.scalar(stmt)
-
-        if job:
-            job.status = "cancelled"
-            job.completed_at = db.func.current_timestamp()
-            job.error_message = "Task cancelled by user"
-            db.session.commit()
+        db.session.commit()
 
         # Return empty content to clear the progress display
         response = make_response(
@@ -977,7 +1317,7 @@ def cancel_enrichment_job(task_id):
 def publish_graph(job_id: uuid.UUID):
     """Publish a preprocessing job graph to the public gallery."""
 
-    job = db.session.get(PreprocessingJob, str(job_id))
+    job = db.session.get(PreprocessingJob, job_id)
 
     if not job or job.status != "completed":
         flash("Job not found or not completed", "error")
@@ -1007,7 +1347,7 @@ def publish_graph(job_id: uuid.UUID):
 def unpublish_graph(job_id: uuid.UUID):
     """Unpublish a preprocessing job graph from the public gallery."""
 
-    job = db.session.get(PreprocessingJob, str(job_id))
+    job = db.session.get(PreprocessingJob, job_id)
 
     if not job:
         flash("Job not found", "error")
@@ -1033,5 +1373,7 @@ def unpublish_graph(job_id: uuid.UUID):
     )
 
 
-# Import combine routes
-from app.main.first import combine_routes  # noqa: F401, E402
+# Import combine routes (also provides the shared immutable-file sender)
+from app.main.first.combine_routes import (  # noqa: E402
+    _send_immutable_graph_file,
+)
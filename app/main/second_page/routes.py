@@ -1,15 +1,26 @@
-from flask import current_app, render_template
+from flask import render_template
 
 from app import cache, htmx
 from app.helpers.app_helpers import make_cache_key_with_htmx
 from app.main.second_page import bp
 
+# Snapshot of app.debug, taken when the blueprint is registered, so the
+# cache `unless` check reads a module global instead of dereferencing
+# the current_app proxy on every request
+_DEBUG = False
+
+
+@bp.record_once
+def _snapshot_debug(state):
+    global _DEBUG
+    _DEBUG = state.app.debug
+
 
 @bp.route("/")
 @cache.cached(
     timeout=600,
     make_cache_key=make_cache_key_with_htmx,
-    unless=lambda: current_app.config.get("DEBUG", False),
+    unless=lambda: _DEBUG,
 )
 def index():
     title = "Second"
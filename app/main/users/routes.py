@@ -1,14 +1,24 @@
 import datetime
 from typing import cast
 
-from flask import flash, make_response, redirect, render_template, request, url_for
+from flask import (
+    current_app,
+    flash,
+    g,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    stream_template,
+    url_for,
+)
 from flask_security import (
     check_and_update_authn_fresh,
     current_user as flask_current_user,
 )
 from flask_security.utils import logout_user
 from flask_wtf import FlaskForm
-from sqlalchemy import select
+from sqlalchemy import and_, select, update
 
 from app import db
 from app.main.users import bp
@@ -16,6 +26,20 @@ from app.models import FriendRequest, FriendRequestStatus, User
 
 current_user = cast(User, flask_current_user)
 
+# Compiled template object for the per-keystroke search partial,
+# resolved once; .render() then skips the name lookup and the
+# render_template signal/context machinery the partial does not use
+_search_rows_template = None
+
+
+def _render_search_rows(**context):
+    global _search_rows_template
+    if _search_rows_template is None:
+        _search_rows_template = current_app.jinja_env.get_template(
+            "partials/_search_table_rows.html"
+        )
+    return _search_rows_template.render(**context)
+
 
 @bp.route("/", methods=["GET"])
 def index():
@@ -42,53 +66,80 @@ def index():
 def search_users():
     # get the search term from the form with the name search
     # and return table rows with results
-    search_term = request.form.get("search", type=str, default="").strip()
+    # Usernames are short; anything beyond this only inflates the ILIKE
+    # patterns the database has to scan with
+    search_term = request.form.get("search", type=str, default="").strip()[:64]
 
     if search_term == "":
-        return render_template(
-            "./partials/_search_table_rows.html",
-            search_results=[],
+        return _render_search_rows(search_results=[])
+
+    words = search_term.split()
+    if len(words) > 1:
+        # A pattern containing the literal space rarely matches anything;
+        # require every word to appear somewhere in the username instead
+        username_filter = and_(
+            *[User.username.ilike(f"%{word}%") for word in words]
         )
+    elif len(search_term) < 3:
+        # Short terms match nearly everything as substrings and are too
+        # small for the trigram index, so degrade them to a prefix match
+        # that a plain btree on username can serve
+        username_filter = User.username.ilike(f"{search_term}%")
+    else:
+        username_filter = User.username.ilike(f"%{search_term}%")
 
-    users = db.session.scalars(
-        select(User)
-        .where(User.username.ilike(f"%{search_term}%"), User.id != current_user.id)
+    # Only the username is rendered, so select just that column instead
+    # of hydrating full User objects (email, password hash, ...)
+    usernames = db.session.scalars(
+        select(User.username)
+        .where(username_filter, User.id != current_user.id)
         .limit(5)
     ).all()
 
     search_results = [
         {
-            "url": url_for("users.profile", username=user.username),
-            "handle": user.username,
+            "url": url_for("users.profile", username=username),
+            "handle": username,
         }
-        for user in users
+        for username in usernames
     ]
 
-    response = render_template(
-        "./partials/_search_table_rows.html",
+    return _render_search_rows(
         search_results=search_results,
         color="gray",
         add_button=True,
     )
-    return response
 
 
 @bp.route("/<username>", methods=["GET"])
 def profile(username):
     user = db.first_or_404(select(User).where(User.username == username))
-    is_friend = current_user.is_friends_with(user.id)
 
-    # Check if there's a pending friend request
+    # One round trip decides both flags: an accepted row in either
+    # direction means friends, a pending row we sent means a request is
+    # still outstanding. current_user is a LocalProxy, so dereference
+    # the id once instead of per comparison.
+    is_friend = False
     pending_request = False
-    if current_user.is_authenticated and current_user.id != user.id:
-        friend_request = db.session.scalar(
-            select(FriendRequest).where(
-                FriendRequest.sender_id == current_user.id,
-                FriendRequest.receiver_id == user.id,
+    uid = current_user.id
+    if current_user.is_authenticated and uid != user.id:
+        rows = db.session.execute(
+            select(FriendRequest.sender_id, FriendRequest.status).where(
+                (
+                    (FriendRequest.sender_id == uid)
+                    & (FriendRequest.receiver_id == user.id)
+                )
+                | (
+                    (FriendRequest.sender_id == user.id)
+                    & (FriendRequest.receiver_id == uid)
+                )
             )
-        )
-        if friend_request and friend_request.status == FriendRequestStatus.PENDING:
-            pending_request = True
+        ).all()
+        for sender_id, status in rows:
+            if status == FriendRequestStatus.ACCEPTED:
+                is_friend = True
+            elif status == FriendRequestStatus.PENDING and sender_id == uid:
+                pending_request = True
 
     return render_template(
         "users/profile.html",
@@ -132,16 +183,33 @@ def send_friend_request():
         return {"message": "Friend request sent"}, 200
 
 
+def _set_request_status(request_id: int | None, status: FriendRequestStatus) -> bool:
+    """Flip a friend request's status with one guarded UPDATE.
+
+    The receiver filter doubles as the authorization check, so no row
+    is selected and hydrated first; a zero rowcount means the request
+    does not exist or is not addressed to the current user.
+    """
+    result = db.session.execute(
+        update(FriendRequest)
+        .where(
+            FriendRequest.request_id == request_id,
+            FriendRequest.receiver_id == current_user.id,
+        )
+        .values(status=status)
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+
 @bp.route("/accept_friend_request", methods=["POST"])
 def accept_friend_request():
     request_id = request.form.get("request_id", type=int)
-    friend_request = db.session.get(FriendRequest, request_id)
-    if not friend_request:
+    if not _set_request_status(request_id, FriendRequestStatus.ACCEPTED):
         return {"error": "Friend request not found"}, 404
-    if friend_request.receiver_id != current_user.id:
-        return {"error": "Unauthorized"}, 403
-    friend_request.status = FriendRequestStatus.ACCEPTED
-    db.session.commit()
+
+    # the friends list changed, drop the per-request memo
+    g.pop("_friends_cache", None)
 
     # emtpy response
     response = make_response("", 204)
@@ -153,21 +221,20 @@ def accept_friend_request():
 @bp.route("/decline_friend_request", methods=["POST"])
 def decline_friend_request():
     request_id = request.form.get("request_id", type=int)
-    friend_request = db.session.get(FriendRequest, request_id)
-    if not friend_request:
+    if not _set_request_status(request_id, FriendRequestStatus.DECLINED):
         return {"error": "Friend request not found"}, 404
-    if friend_request.receiver_id != current_user.id:
-        return {"error": "Unauthorized"}, 403
-    friend_request.status = FriendRequestStatus.DECLINED
-    db.session.commit()
     return {"message": "Friend request declined"}, 200
 
 
 @bp.route("/friends", methods=["GET"])
 def friends():
-    return render_template(
-        "users/partials/_friends.html",
-        friends=current_user.friends,
+    # Stream the fragment: htmx starts receiving rows while Jinja is
+    # still rendering instead of waiting for the full string
+    return current_app.response_class(
+        stream_template(
+            "users/partials/_friends.html",
+            friends=current_user.friends,
+        )
     )
 
 
@@ -181,8 +248,11 @@ def friend_requests():
             FriendRequest.status == FriendRequestStatus.PENDING,
         )
     ).all()
-    return render_template(
-        "users/partials/_friend-requests.html", incoming_requests=incoming_requests
+    return current_app.response_class(
+        stream_template(
+            "users/partials/_friend-requests.html",
+            incoming_requests=incoming_requests,
+        )
     )
 
 
@@ -2,17 +2,22 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-from enum import Enum
+from enum import IntEnum
 from typing import TYPE_CHECKING
 
+from flask import g, has_request_context
 from flask_security.models import fsqla_v3 as fsqla
 from sqlalchemy import (
     DateTime,
     ForeignKey,
+    Index,
+    SmallInteger,
     String,
     UniqueConstraint,
+    Uuid,
     func,
     select,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -58,8 +63,11 @@ class User(Model, fsqla.FsUserMixin):
         )
 
     def is_friends_with(self, other_user_id: int) -> bool:
+        # LIMIT 1 probe on the key column only: no FriendRequest object
+        # is hydrated just to check presence
         friendship = db.session.scalar(
-            select(FriendRequest).where(
+            select(FriendRequest.request_id)
+            .where(
                 (
                     (
                         (FriendRequest.sender_id == self.id)
@@ -72,6 +80,7 @@ class User(Model, fsqla.FsUserMixin):
                 )
                 & (FriendRequest.status == FriendRequestStatus.ACCEPTED)
             )
+            .limit(1)
         )
         return friendship is not None
 
@@ -81,42 +90,66 @@ class User(Model, fsqla.FsUserMixin):
 
     @property
     def friends(self):
-        sent_accepted = db.session.scalars(
-            select(FriendRequest).where(
-                (FriendRequest.sender_id == self.id)
-                & (FriendRequest.status == FriendRequestStatus.ACCEPTED)
-            )
-        ).all()
-
-        received_accepted = db.session.scalars(
-            select(FriendRequest).where(
-                (FriendRequest.receiver_id == self.id)
-                & (FriendRequest.status == FriendRequestStatus.ACCEPTED)
+        # Memoized on g for the rest of the request (handlers pass the
+        # list to templates that may read it again); keyed by user id so
+        # a page rendering another user's friends cannot hit the wrong
+        # entry
+        if has_request_context():
+            cached = getattr(g, "_friends_cache", None)
+            if cached is not None and cached[0] == self.id:
+                return cached[1]
+
+        # One round trip: join User through FriendRequest with an OR on
+        # the direction, instead of loading both request lists and then
+        # re-querying the users by id
+        result = db.session.scalars(
+            select(User)
+            .join(
+                FriendRequest,
+                (
+                    (FriendRequest.sender_id == self.id)
+                    & (User.id == FriendRequest.receiver_id)
+                )
+                | (
+                    (FriendRequest.receiver_id == self.id)
+                    & (User.id == FriendRequest.sender_id)
+                ),
             )
+            .where(FriendRequest.status == FriendRequestStatus.ACCEPTED)
+            # mutual requests (A→B and B→A both accepted) would join the
+            # same user once per row
+            .distinct()
         ).all()
 
-        friends_ids = set(
-            [req.receiver_id for req in sent_accepted]
-            + [req.sender_id for req in received_accepted]
-        )
+        if has_request_context():
+            g._friends_cache = (self.id, result)
+        return result
 
-        return db.session.scalars(select(User).where(User.id.in_(friends_ids))).all()
 
-
-class FriendRequestStatus(Enum):
-    PENDING = "PENDING"
-    ACCEPTED = "ACCEPTED"
-    DECLINED = "DECLINED"
+class FriendRequestStatus(IntEnum):
+    # Stored as a SMALLINT: 2 bytes per row in the status indexes
+    # instead of an 8+ byte label
+    PENDING = 0
+    ACCEPTED = 1
+    DECLINED = 2
 
 
 class FriendRequest(TimestampMixin, Model):
+    # direction + status composites back the friends/profile lookups;
+    # the unique constraint used to sit loose in the class body, where
+    # it was never attached to the table
+    __table_args__ = (
+        UniqueConstraint("sender_id", "receiver_id"),
+        Index("ix_friend_request_receiver_status", "receiver_id", "status"),
+        Index("ix_friend_request_sender_status", "sender_id", "status"),
+    )
+
     request_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     sender_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
     receiver_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
     status: Mapped[FriendRequestStatus] = mapped_column(
-        default=FriendRequestStatus.PENDING
+        SmallInteger, default=FriendRequestStatus.PENDING
     )
-    UniqueConstraint("sender_id", "receiver_id")
 
 
 class UploadedFile(TimestampMixin, Model):
@@ -129,8 +162,13 @@ class UploadedFile(TimestampMixin, Model):
     )
     name: Mapped[str] = mapped_column(String(255))
     file_size: Mapped[int] = mapped_column(db.BigInteger)
+    # SHA-256 of the file contents, computed while the upload streams to
+    # disk; lets repeat uploads be detected without re-reading the file
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True)
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), index=True
+    )
     user: Mapped[User] = relationship(back_populates="uploaded_files")
 
     # Date range from the parquet data
@@ -163,10 +201,19 @@ class UploadedFile(TimestampMixin, Model):
 
 class PreprocessingJob(Model):
     __tablename__ = "preprocessing_jobs"
-
-    uuid: Mapped[str] = mapped_column(
-        String(36), primary_key=True, default=lambda: str(uuid.uuid4())
+    # backs the completed-jobs listing (filter by file + status, newest first)
+    __table_args__ = (
+        Index(
+            "ix_preprocessing_jobs_file_status_completed",
+            "file_uuid",
+            "status",
+            text("completed_at DESC"),
+        ),
     )
+
+    # Native UUID on PostgreSQL (16-byte binary index keys instead of
+    # 36-byte string compares); CHAR(32) on backends without one
+    uuid: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     task_id: Mapped[str | None] = mapped_column(String(255), unique=True)
     file_uuid: Mapped[str] = mapped_column(
         ForeignKey("uploaded_files.uuid", ondelete="CASCADE")
@@ -206,12 +253,20 @@ class PreprocessingJob(Model):
 
 class PlaylistEnrichmentJob(Model):
     __tablename__ = "playlist_enrichment_jobs"
+    # backs the per-job status lookups (running check, enriched flag)
+    __table_args__ = (
+        Index(
+            "ix_playlist_enrichment_jobs_job_status",
+            "preprocessing_job_id",
+            "status",
+        ),
+    )
 
     uuid: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
     task_id: Mapped[str] = mapped_column(String(255), unique=True)
-    preprocessing_job_id: Mapped[str] = mapped_column(
+    preprocessing_job_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("preprocessing_jobs.uuid", ondelete="CASCADE")
     )
     preprocessing_job: Mapped[PreprocessingJob] = relationship(
@@ -241,18 +296,26 @@ class PlaylistEnrichmentJob(Model):
 
 class CombinedPreprocessingJob(Model):
     __tablename__ = "combined_preprocessing_jobs"
+    # backs the per-user history listing, newest first
+    __table_args__ = (
+        Index(
+            "ix_combined_preprocessing_jobs_user_started",
+            "user_id",
+            text("started_at DESC"),
+        ),
+    )
 
     uuid: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
 
     # References to the two preprocessing jobs being combined
-    first_job_id: Mapped[str] = mapped_column(
+    first_job_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("preprocessing_jobs.uuid", ondelete="CASCADE")
     )
     first_job: Mapped[PreprocessingJob] = relationship(foreign_keys=[first_job_id])
 
-    second_job_id: Mapped[str] = mapped_column(
+    second_job_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("preprocessing_jobs.uuid", ondelete="CASCADE")
     )
     second_job: Mapped[PreprocessingJob] = relationship(foreign_keys=[second_job_id])
@@ -265,6 +328,11 @@ class CombinedPreprocessingJob(Model):
     )
     completed_at: Mapped[datetime | None]
 
+    # Progress reporting, written by the task so the status endpoint can be
+    # served from the DB instead of the Celery result backend
+    percent: Mapped[int | None]
+    current_step: Mapped[str | None] = mapped_column(String(255))
+
     # Combined output files
     edges_file: Mapped[str | None] = mapped_column(String(500))
     nodes_file: Mapped[str | None] = mapped_column(String(500))
@@ -72,7 +72,7 @@ def view_graph(graph_type, graph_id):
 
     if graph_type == "regular":
         stmt = select(PreprocessingJob).where(
-            PreprocessingJob.uuid == str(graph_id), PreprocessingJob.published
+            PreprocessingJob.uuid == graph_id, PreprocessingJob.published
         )
         job = db.session.scalar(stmt)
 
@@ -109,13 +109,11 @@ def view_graph(graph_type, graph_id):
 @bp.route("/graph-data/<graph_type>/<uuid:graph_id>/nodes")
 def graph_nodes_data(graph_type, graph_id):
     """Serve nodes data for a published graph."""
-    from pathlib import Path
-
     from flask import current_app, jsonify, send_from_directory
 
     if graph_type == "regular":
         stmt = select(PreprocessingJob).where(
-            PreprocessingJob.uuid == str(graph_id), PreprocessingJob.published
+            PreprocessingJob.uuid == graph_id, PreprocessingJob.published
         )
         job = db.session.scalar(stmt)
 
@@ -125,12 +123,8 @@ def graph_nodes_data(graph_type, graph_id):
         if not job.nodes_file:
             return jsonify({"error": "No nodes file path set"}), 404
 
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        nodes_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.nodes_file
-        )
+        # Resolved once at app init; see app.extensions["cfg"]
+        nodes_path = current_app.extensions["cfg"].preprocessed_path / job.nodes_file
 
         if not nodes_path.exists():
             return jsonify({"error": f"Nodes file not found at {nodes_path}"}), 404
@@ -152,12 +146,8 @@ def graph_nodes_data(graph_type, graph_id):
         if not job.nodes_file:
             return jsonify({"error": "No nodes file path set"}), 404
 
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        nodes_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.nodes_file
-        )
+        # Resolved once at app init; see app.extensions["cfg"]
+        nodes_path = current_app.extensions["cfg"].preprocessed_path / job.nodes_file
 
         if not nodes_path.exists():
             return jsonify({"error": f"Nodes file not found at {nodes_path}"}), 404
@@ -172,13 +162,11 @@ def graph_nodes_data(graph_type, graph_id):
 @bp.route("/graph-data/<graph_type>/<uuid:graph_id>/edges")
 def graph_edges_data(graph_type, graph_id):
     """Serve edges data for a published graph."""
-    from pathlib import Path
-
     from flask import current_app, jsonify, send_from_directory
 
     if graph_type == "regular":
         stmt = select(PreprocessingJob).where(
-            PreprocessingJob.uuid == str(graph_id), PreprocessingJob.published
+            PreprocessingJob.uuid == graph_id, PreprocessingJob.published
         )
         job = db.session.scalar(stmt)
 
@@ -188,12 +176,8 @@ def graph_edges_data(graph_type, graph_id):
         if not job.edges_file:
             return jsonify({"error": "No edges file path set"}), 404
 
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        edges_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.edges_file
-        )
+        # Resolved once at app init; see app.extensions["cfg"]
+        edges_path = current_app.extensions["cfg"].preprocessed_path / job.edges_file
 
         if not edges_path.exists():
             return jsonify({"error": f"Edges file not found at {edges_path}"}), 404
@@ -215,12 +199,8 @@ def graph_edges_data(graph_type, graph_id):
         if not job.edges_file:
             return jsonify({"error": "No edges file path set"}), 404
 
-        preprocessed_data_dir = current_app.config.get(
-            "PREPROCESSED_DATA_DIR", "preprocessed"
-        )
-        edges_path = (
-            Path(current_app.static_folder) / preprocessed_data_dir / job.edges_file
-        )
+        # Resolved once at app init; see app.extensions["cfg"]
+        edges_path = current_app.extensions["cfg"].preprocessed_path / job.edges_file
 
         if not edges_path.exists():
             return jsonify({"error": f"Edges file not found at {edges_path}"}), 404
@@ -1,5 +1,7 @@
 """Celery task for combining two preprocessed datasets."""
 
+import gzip
+import shutil
 from datetime import datetime
 from pathlib import Path
 
@@ -13,6 +15,26 @@ from app import create_app, db
 from app.models import CombinedPreprocessingJob
 
 
+def _report_progress(task, combined_job: CombinedPreprocessingJob, percent: int, step: str):
+    """Report progress to Celery and persist it on the job record.
+
+    The DB copy lets the status endpoint answer polls without a result
+    backend round trip.
+    """
+    task.update_state(
+        state="PROGRESS",
+        meta={
+            "current": percent,
+            "total": 100,
+            "status": step,
+            "percent": percent,
+        },
+    )
+    combined_job.percent = percent
+    combined_job.current_step = step
+    db.session.commit()
+
+
 @shared_task(bind=True)
 def combine_preprocessed_datasets(self, combined_job_id: str):
     """
@@ -35,15 +57,7 @@ def combine_preprocessed_datasets(self, combined_job_id: str):
                 return {"status": "error", "error": "Combined job not found"}
 
             # Update task status
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current": 10,
-                    "total": 100,
-                    "status": "Loading first dataset...",
-                    "percent": 10,
-                },
-            )
+            _report_progress(self, combined_job, 10, "Loading first dataset...")
 
             # Get the preprocessing jobs
             first_job = combined_job.first_job
@@ -77,15 +91,7 @@ def combine_preprocessed_datasets(self, combined_job_id: str):
             first_nodes_df["dataset_source"] = "first"
             first_edges_df["dataset_source"] = "first"
 
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current": 30,
-                    "total": 100,
-                    "status": "Loading second dataset...",
-                    "percent": 30,
-                },
-            )
+            _report_progress(self, combined_job, 30, "Loading second dataset...")
 
             # Load second dataset
             second_nodes_path = (
@@ -106,15 +112,7 @@ def combine_preprocessed_datasets(self, combined_job_id: str):
             second_nodes_df["dataset_source"] = "second"
             second_edges_df["dataset_source"] = "second"
 
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current": 50,
-                    "total": 100,
-                    "status": "Combining datasets...",
-                    "percent": 50,
-                },
-            )
+            _report_progress(self, combined_job, 50, "Combining datasets...")
 
             # Identify nodes that exist in both datasets
             # Use 'playlist_id' as the node identifier
@@ -167,15 +165,7 @@ def combine_preprocessed_datasets(self, combined_job_id: str):
                 subset=["playlist_id_1", "playlist_id_2"], keep="last"
             )
 
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current": 70,
-                    "total": 100,
-                    "status": "Saving combined dataset...",
-                    "percent": 70,
-                },
-            )
+            _report_progress(self, combined_job, 70, "Saving combined dataset...")
 
             # Generate output filenames
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -194,15 +184,17 @@ def combine_preprocessed_datasets(self, combined_job_id: str):
             combined_nodes_df.to_csv(nodes_output_path, index=False)
             combined_edges_df.to_csv(edges_output_path, index=False)
 
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current": 90,
-                    "total": 100,
-                    "status": "Updating database...",
-                    "percent": 90,
-                },
-            )
+            # Pre-compress once so the data endpoints can serve the .gz
+            # variant without per-request compression CPU
+            for output_path in (nodes_output_path, edges_output_path):
+                gz_path = output_path.with_suffix(output_path.suffix + ".gz")
+                with (
+                    output_path.open("rb") as src,
+                    gzip.open(gz_path, "wb", compresslevel=6) as dst,
+                ):
+                    shutil.copyfileobj(src, dst)
+
+            _report_progress(self, combined_job, 90, "Updating database...")
 
             # Extract date ranges from original parquet files if available
             first_file = first_job.uploaded_file
@@ -240,6 +232,8 @@ def combine_preprocessed_datasets(self, combined_job_id: str):
 
             # Update the combined job record
             combined_job.status = "completed"
+            combined_job.percent = 100
+            combined_job.current_step = "Complete!"
             combined_job.completed_at = datetime.utcnow()
             combined_job.nodes_file = nodes_filename
             combined_job.edges_file = edges_filename
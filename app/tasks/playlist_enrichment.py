@@ -1,3 +1,4 @@
+import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import UTC, datetime
 from pathlib import Path
@@ -22,9 +23,13 @@ def enrich_playlist_nodes(self, preprocessing_job_uuid: str):
     """
 
     try:
+        # The task id crosses the broker as a JSON string; the column is
+        # a native UUID now, so convert once here
+        preprocessing_job_id = uuid.UUID(preprocessing_job_uuid)
+
         # Create enrichment job record
         job = PlaylistEnrichmentJob(
-            preprocessing_job_id=preprocessing_job_uuid,
+            preprocessing_job_id=preprocessing_job_id,
             task_id=self.request.id,
             status="processing",
         )  # type: ignore
@@ -37,7 +42,7 @@ def enrich_playlist_nodes(self, preprocessing_job_uuid: str):
 
         # Get the preprocessing job to find the nodes file
         stmt = select(PreprocessingJob).where(
-            PreprocessingJob.uuid == preprocessing_job_uuid
+            PreprocessingJob.uuid == preprocessing_job_id
         )
         preprocessing_job = db.session.scalar(stmt)
 
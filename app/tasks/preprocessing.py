@@ -1,3 +1,5 @@
+import gzip
+import shutil
 import uuid
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
@@ -161,11 +163,21 @@ def save_graph(
         f.write("playlist_id\n")
         f.writelines(f"{node}\n" for node in graph.nodes)
 
+    # Pre-compress once so the graph-data endpoints can serve the .gz
+    # sibling with Content-Encoding: gzip instead of raw CSV
+    for output_file in (edges_file, nodes_file):
+        gz_file = output_file.with_suffix(output_file.suffix + ".gz")
+        with (
+            Path.open(output_file, "rb") as src,
+            gzip.open(gz_file, "wb", compresslevel=6) as dst,
+        ):
+            shutil.copyfileobj(src, dst)
+
     return str(edges_file), str(nodes_file)
 
 
 @shared_task(bind=True)
-def preprocess_spotify_data_original(self, file_uuid: uuid.UUID, job_uuid: str):
+def preprocess_spotify_data_original(self, file_uuid: uuid.UUID, job_uuid: uuid.UUID):
     """
     Celery task using the exact same algorithm as create_data.py.
     """
@@ -173,6 +185,10 @@ def preprocess_spotify_data_original(self, file_uuid: uuid.UUID, job_uuid: str):
         logger.info(f"Task {self.request.id} aborted before started processing")
         raise Ignore
     try:
+        # kombu round-trips uuid.UUID natively; the str branch covers
+        # messages queued before the column became a native UUID
+        if not isinstance(job_uuid, uuid.UUID):
+            job_uuid = uuid.UUID(job_uuid)
         job = db.session.get(PreprocessingJob, job_uuid)
         if not job:
             logger.error(f"No preprocessing job found for uuid: {job_uuid}")
@@ -4,9 +4,8 @@
 # Function to start the Flask server
 start_server() {
     if [ "$APP_SETTINGS" = "config.ProductionConfig" ]; then
-        WORKERS=${GUNICORN_WORKERS:-2}
-        echo "Starting Flask server in production with $WORKERS workers..."
-        exec gunicorn --bind :5000 --access-logfile - --error-logfile - flask_app:app --workers $WORKERS
+        echo "Starting Flask server in production with gunicorn.conf.py..."
+        exec gunicorn -c gunicorn.conf.py flask_app:app
     else
         echo "Starting Flask server in dev..."
         python3 flask_app.py
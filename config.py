@@ -12,6 +12,13 @@ class BaseConfig:
 
     LOG_TO_STDOUT = os.environ.get("LOG_TO_STDOUT")
     PREPROCESSED_DATA_DIR = "preprocessed"
+    # When set (e.g. "/internal/preprocessed"), graph data files are served
+    # via X-Accel-Redirect so nginx does the transfer instead of the worker.
+    # Requires a matching internal location block in the nginx config.
+    X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX")
+    # Werkzeug rejects oversize request bodies at the WSGI layer; slightly
+    # above the 500MB upload cap to leave room for multipart overhead
+    MAX_CONTENT_LENGTH = 501 * 1024 * 1024
     SERVER_NAME = os.getenv("HOST_NAME")
     SECURITY_PASSWORD_SALT = os.getenv("SECURITY_PASSWORD_SALT")
 
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+bind = ":5000"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+# build the app once in the master so workers share the import cost
+preload_app = True
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Re-initialize state that does not survive the fork.
+
+    With preload_app the app (and Celery producer pool, logging queue
+    listener, ...) is constructed in the master process; threads and open
+    connections are not inherited by workers.
+    """
+    from flask_app import app
+
+    # the QueueListener thread only exists in the master; start a fresh one
+    log_listener = app.extensions.get("log_listener")
+    if log_listener is not None:
+        log_listener.start()
+
+    # drop broker/result connections inherited from the master so each
+    # worker opens its own
+    celery_app = app.extensions.get("celery")
+    if celery_app is not None and celery_app._pool is not None:
+        celery_app._pool.force_close_all()
+        celery_app._pool = None
@@ -0,0 +1,77 @@
+"""store friend request status as smallint
+
+Revision ID: 8b4c2e9f7d31
+Revises: 9d2f6a84c5e1
+Create Date: 2026-08-31 18:14:37.291053
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4c2e9f7d31'
+down_revision = '9d2f6a84c5e1'
+branch_labels = None
+depends_on = None
+
+_LABELS = {'PENDING': 0, 'ACCEPTED': 1, 'DECLINED': 2}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            'ALTER TABLE friend_request ALTER COLUMN status TYPE smallint '
+            'USING CASE status::text '
+            + ' '.join(f"WHEN '{label}' THEN {code}" for label, code in _LABELS.items())
+            + ' END'
+        )
+        op.execute('DROP TYPE friendrequeststatus')
+    else:
+        # Batch-recreate the table with the narrow type first (the old
+        # label CHECK constraint is dropped with it), then map the
+        # copied-over labels to their codes
+        with op.batch_alter_table('friend_request', schema=None) as batch_op:
+            batch_op.alter_column(
+                'status',
+                existing_type=sa.Enum(
+                    'PENDING', 'ACCEPTED', 'DECLINED', name='friendrequeststatus'
+                ),
+                type_=sa.SmallInteger(),
+                existing_nullable=False,
+            )
+        op.execute(
+            'UPDATE friend_request SET status = CASE status '
+            + ' '.join(f"WHEN '{label}' THEN {code}" for label, code in _LABELS.items())
+            + ' END'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TYPE friendrequeststatus AS ENUM "
+            "('PENDING', 'ACCEPTED', 'DECLINED')"
+        )
+        op.execute(
+            'ALTER TABLE friend_request ALTER COLUMN status '
+            'TYPE friendrequeststatus '
+            'USING (CASE status '
+            + ' '.join(f"WHEN {code} THEN '{label}'" for label, code in _LABELS.items())
+            + ' END)::friendrequeststatus'
+        )
+    else:
+        op.execute(
+            'UPDATE friend_request SET status = CASE status '
+            + ' '.join(f"WHEN {code} THEN '{label}'" for label, code in _LABELS.items())
+            + ' END'
+        )
+        with op.batch_alter_table('friend_request', schema=None) as batch_op:
+            batch_op.alter_column(
+                'status',
+                existing_type=sa.SmallInteger(),
+                type_=sa.Enum(
+                    'PENDING', 'ACCEPTED', 'DECLINED', name='friendrequeststatus'
+                ),
+                existing_nullable=False,
+            )
@@ -0,0 +1,48 @@
+"""add history query indexes
+
+Revision ID: 8f2a6e5d0b17
+Revises: c4d81a7b29e3
+Create Date: 2026-08-31 11:02:17.493820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2a6e5d0b17'
+down_revision = 'c4d81a7b29e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('uploaded_files', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_uploaded_files_user_id'), ['user_id'], unique=False
+        )
+
+    with op.batch_alter_table('preprocessing_jobs', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_preprocessing_jobs_file_status_completed',
+            ['file_uuid', 'status', sa.text('completed_at DESC')],
+            unique=False,
+        )
+
+    with op.batch_alter_table('combined_preprocessing_jobs', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_combined_preprocessing_jobs_user_started',
+            ['user_id', sa.text('started_at DESC')],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('combined_preprocessing_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_combined_preprocessing_jobs_user_started')
+
+    with op.batch_alter_table('preprocessing_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_preprocessing_jobs_file_status_completed')
+
+    with op.batch_alter_table('uploaded_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_uploaded_files_user_id'))
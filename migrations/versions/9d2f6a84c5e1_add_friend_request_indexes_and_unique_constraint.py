@@ -0,0 +1,37 @@
+"""add friend request indexes and unique constraint
+
+Revision ID: 9d2f6a84c5e1
+Revises: c7e5d3b8a1f4
+Create Date: 2026-08-31 18:02:55.734806
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2f6a84c5e1'
+down_revision = 'c7e5d3b8a1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('friend_request', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_friend_request_receiver_status', ['receiver_id', 'status'], unique=False
+        )
+        batch_op.create_index(
+            'ix_friend_request_sender_status', ['sender_id', 'status'], unique=False
+        )
+        batch_op.create_unique_constraint(
+            batch_op.f('uq_friend_request_sender_id'), ['sender_id', 'receiver_id']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('friend_request', schema=None) as batch_op:
+        batch_op.drop_constraint(
+            batch_op.f('uq_friend_request_sender_id'), type_='unique'
+        )
+        batch_op.drop_index('ix_friend_request_sender_status')
+        batch_op.drop_index('ix_friend_request_receiver_status')
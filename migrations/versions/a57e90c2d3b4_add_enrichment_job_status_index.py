@@ -0,0 +1,29 @@
+"""add enrichment job status index
+
+Revision ID: a57e90c2d3b4
+Revises: d91b3c7f4a28
+Create Date: 2026-08-31 14:05:33.912641
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a57e90c2d3b4'
+down_revision = 'd91b3c7f4a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('playlist_enrichment_jobs', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_playlist_enrichment_jobs_job_status',
+            ['preprocessing_job_id', 'status'],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('playlist_enrichment_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_playlist_enrichment_jobs_job_status')
@@ -0,0 +1,28 @@
+"""add progress columns to combined jobs
+
+Revision ID: c4d81a7b29e3
+Revises: 3526b4c1d6e5
+Create Date: 2026-08-31 10:12:45.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d81a7b29e3'
+down_revision = '3526b4c1d6e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('combined_preprocessing_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('percent', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('current_step', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('combined_preprocessing_jobs', schema=None) as batch_op:
+        batch_op.drop_column('current_step')
+        batch_op.drop_column('percent')
@@ -0,0 +1,30 @@
+"""add content hash to uploaded files
+
+Revision ID: d91b3c7f4a28
+Revises: 8f2a6e5d0b17
+Create Date: 2026-08-31 12:41:09.287530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91b3c7f4a28'
+down_revision = '8f2a6e5d0b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('uploaded_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(
+            batch_op.f('ix_uploaded_files_content_hash'), ['content_hash'], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('uploaded_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_uploaded_files_content_hash'))
+        batch_op.drop_column('content_hash')
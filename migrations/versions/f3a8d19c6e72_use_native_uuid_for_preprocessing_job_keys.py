@@ -0,0 +1,128 @@
+"""use native uuid for preprocessing job keys
+
+Revision ID: f3a8d19c6e72
+Revises: a57e90c2d3b4
+Create Date: 2026-08-31 16:22:47.501238
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d19c6e72'
+down_revision = 'a57e90c2d3b4'
+branch_labels = None
+depends_on = None
+
+
+# (table, column) pairs that hold a preprocessing job key
+_COLUMNS = [
+    ('preprocessing_jobs', 'uuid'),
+    ('playlist_enrichment_jobs', 'preprocessing_job_id'),
+    ('combined_preprocessing_jobs', 'first_job_id'),
+    ('combined_preprocessing_jobs', 'second_job_id'),
+]
+
+# Foreign keys that reference preprocessing_jobs.uuid and block the type
+# change on PostgreSQL: (table, constraint name, column, ondelete)
+_FOREIGN_KEYS = [
+    (
+        'playlist_enrichment_jobs',
+        'fk_playlist_enrichment_jobs_preprocessing_job_id_preprocessing_jobs',
+        'preprocessing_job_id',
+        'CASCADE',
+    ),
+    (
+        'combined_preprocessing_jobs',
+        'fk_combined_preprocessing_jobs_first_job_id_preprocessing_jobs',
+        'first_job_id',
+        'CASCADE',
+    ),
+    (
+        'combined_preprocessing_jobs',
+        'fk_combined_preprocessing_jobs_second_job_id_preprocessing_jobs',
+        'second_job_id',
+        'CASCADE',
+    ),
+]
+
+
+def _pg_name(name):
+    # PostgreSQL silently truncates identifiers to 63 bytes, so the
+    # stored constraint names are the truncated ones
+    return name[:63]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for table, constraint, _column, _ondelete in _FOREIGN_KEYS:
+            op.drop_constraint(_pg_name(constraint), table, type_='foreignkey')
+        for table, column in _COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.Uuid(),
+                postgresql_using=f'{column}::uuid',
+            )
+        for table, constraint, column, ondelete in _FOREIGN_KEYS:
+            op.create_foreign_key(
+                _pg_name(constraint),
+                table,
+                'preprocessing_jobs',
+                [column],
+                ['uuid'],
+                ondelete=ondelete,
+            )
+    else:
+        # Character-based backends store the UUID as the 32-char hex
+        # digest, so strip the hyphens before narrowing the column
+        for table, column in _COLUMNS:
+            op.execute(
+                sa.text(f"UPDATE {table} SET {column} = replace({column}, '-', '')")
+            )
+        for table, column in _COLUMNS:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.alter_column(
+                    column, existing_type=sa.String(length=36), type_=sa.Uuid()
+                )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for table, constraint, _column, _ondelete in _FOREIGN_KEYS:
+            op.drop_constraint(_pg_name(constraint), table, type_='foreignkey')
+        for table, column in _COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.String(length=36),
+                postgresql_using=f'{column}::text',
+            )
+        for table, constraint, column, ondelete in _FOREIGN_KEYS:
+            op.create_foreign_key(
+                _pg_name(constraint),
+                table,
+                'preprocessing_jobs',
+                [column],
+                ['uuid'],
+                ondelete=ondelete,
+            )
+    else:
+        for table, column in _COLUMNS:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.alter_column(
+                    column, existing_type=sa.Uuid(), type_=sa.String(length=36)
+                )
+        # Restore the canonical hyphenated form the String era used
+        for table, column in _COLUMNS:
+            op.execute(
+                sa.text(
+                    f"UPDATE {table} SET {column} = "
+                    f"substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' "
+                    f"|| substr({column}, 13, 4) || '-' || substr({column}, 17, 4) "
+                    f"|| '-' || substr({column}, 21)"
+                )
+            )
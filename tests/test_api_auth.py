@@ -0,0 +1,88 @@
+"""Tests for the WSGI-level /api authentication middleware."""
+
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    """Create a test app instance."""
+    os.environ["APP_SETTINGS"] = "config.TestingConfig"
+
+    app = create_app()
+    app.config.update(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "WTF_CSRF_ENABLED": False,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _session_cookie(app, user_id="some-uniquifier"):
+    serializer = app.session_interface.get_signing_serializer(app)
+    return serializer.dumps({"_user_id": user_id})
+
+
+def test_api_without_cookie_is_unauthorized(client):
+    response = client.get("/api/")
+    assert response.status_code == 401
+    assert response.json == {"error": "unauthorized"}
+
+
+def test_api_with_tampered_cookie_is_unauthorized(app, client):
+    client.set_cookie(
+        app.config.get("SESSION_COOKIE_NAME", "session"),
+        _session_cookie(app) + "tampered",
+    )
+    assert client.get("/api/").status_code == 401
+
+
+def test_api_with_valid_session_cookie_passes(app, client):
+    client.set_cookie(
+        app.config.get("SESSION_COOKIE_NAME", "session"), _session_cookie(app)
+    )
+    assert client.get("/api/").status_code == 200
+
+
+def test_api_with_expired_session_cookie_is_unauthorized(app, client):
+    client.set_cookie(
+        app.config.get("SESSION_COOKIE_NAME", "session"), _session_cookie(app)
+    )
+    beyond_lifetime = (
+        time.time() + app.permanent_session_lifetime.total_seconds() + 60
+    )
+    with mock.patch("time.time", return_value=beyond_lifetime):
+        assert client.get("/api/").status_code == 401
+
+
+def test_api_with_remember_cookie_only_passes(app, client):
+    from flask_login.utils import encode_cookie
+
+    with app.app_context():
+        remember_cookie = encode_cookie("some-uniquifier")
+    client.set_cookie(
+        app.config.get("REMEMBER_COOKIE_NAME", "remember_token"), remember_cookie
+    )
+    assert client.get("/api/").status_code == 200
+
+
+def test_non_api_paths_are_not_intercepted(client):
+    # a prefix match on "/api" must not capture sibling paths
+    assert client.get("/apifoo").status_code != 401
@@ -0,0 +1,129 @@
+"""Regression tests for per-user scoping of combined-job reads.
+
+The scoping is applied by a do_orm_execute listener; these tests pin
+down that the user id is bound per execution and not baked into
+SQLAlchemy's compiled-statement cache by whichever user queried first.
+"""
+
+import os
+import uuid
+
+import pytest
+
+from app import create_app, db
+from app.models import CombinedPreprocessingJob, PreprocessingJob, UploadedFile
+
+
+@pytest.fixture
+def app():
+    """Create a test app without holding an app context open.
+
+    The shared conftest fixture yields inside an app context, which
+    Flask then reuses for every test-client request — flask-login's
+    per-request user cache on g would leak between the two clients and
+    mask exactly the cross-user bugs these tests exist to catch.
+    """
+    os.environ["APP_SETTINGS"] = "config.TestingConfig"
+
+    app = create_app()
+    app.config.update(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "WTF_CSRF_ENABLED": False,
+        }
+    )
+
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def combined_job_uuids(app):
+    """Two users, each owning one completed combined job."""
+    from flask_security import hash_password
+
+    from app.extensions.security import user_datastore
+
+    jobs = {}
+    with app.app_context():
+        for name in ("alice", "bob"):
+            user = user_datastore.create_user(
+                email=f"{name}@example.com",
+                username=name,
+                password=hash_password("password"),
+                active=True,
+                confirmed_at=db.func.now(),
+            )
+            db.session.commit()
+
+            uploaded_file = UploadedFile(
+                uuid=str(uuid.uuid4()),
+                name=f"{name}.parquet",
+                file_size=10,
+                user_id=user.id,
+            )
+            db.session.add(uploaded_file)
+            db.session.flush()
+            first_job = PreprocessingJob(
+                file_uuid=uploaded_file.uuid, status="completed"
+            )
+            second_job = PreprocessingJob(
+                file_uuid=uploaded_file.uuid, status="completed"
+            )
+            db.session.add_all([first_job, second_job])
+            db.session.flush()
+            combined_job = CombinedPreprocessingJob(
+                first_job_id=first_job.uuid,
+                second_job_id=second_job.uuid,
+                user_id=user.id,
+                status="completed",
+            )
+            db.session.add(combined_job)
+            db.session.commit()
+            jobs[name] = combined_job.uuid
+    return jobs
+
+
+def _login(client, email):
+    client.post(
+        "/login",
+        data={"email": email, "password": "password"},
+        follow_redirects=True,
+    )
+
+
+def test_combined_job_reads_are_scoped_per_user(app, combined_job_uuids):
+    """Each user sees only their own combined job, in either access order."""
+    alice = app.test_client()
+    _login(alice, "alice@example.com")
+    bob = app.test_client()
+    _login(bob, "bob@example.com")
+
+    alice_job = combined_job_uuids["alice"]
+    bob_job = combined_job_uuids["bob"]
+
+    # alice primes the statement cache with her own id ...
+    assert alice.get(f"/files/combine/view/{alice_job}").status_code == 200
+    # ... which must not leak her job to bob, nor hide bob's own job
+    assert bob.get(f"/files/combine/view/{alice_job}").status_code == 404
+    assert bob.get(f"/files/combine/view/{bob_job}").status_code == 200
+    # and the reverse order still serves alice her own job
+    assert alice.get(f"/files/combine/view/{bob_job}").status_code == 404
+    assert alice.get(f"/files/combine/view/{alice_job}").status_code == 200
+
+
+def test_combined_history_lists_only_own_jobs(app, combined_job_uuids):
+    """The history partial never renders another user's jobs."""
+    alice = app.test_client()
+    _login(alice, "alice@example.com")
+
+    response = alice.get("/files/combine/history")
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert combined_job_uuids["alice"] in body
+    assert combined_job_uuids["bob"] not in body